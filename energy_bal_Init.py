@@ -1,31 +1,74 @@
+"""
+Calculate the solar position using a variety of methods/packages.
+"""
+
+# Contributors:
+# Rob Andrews (@Calama-Consulting), Calama Consulting, 2014
+# Will Holmgren (@wholmgren), University of Arizona, 2014
+# Tony Lorenzo (@alorenzo175), University of Arizona, 2015
+# Cliff hansen (@cwhanse), Sandia National Laboratories, 2018
+
 import os
 import datetime as dt
-try:
-    from importlib import reload
-except ImportError:
-    try:
-        from imp import reload
-    except ImportError:
-        pass
+import functools
+import importlib.util
+import math
+import weakref
 
 import numpy as np
 import pandas as pd
 import scipy.optimize as so
-import warnings
 
 from pvlib import atmosphere
 from pvlib.tools import datetime_to_djd, djd_to_datetime
 
 
-NS_PER_HR = 1.e9 * 3600.  # nanoseconds per hour
+def _nocompile(*args, **kwargs):
+    return lambda func: func
+
+
+try:
+    from numba import njit, prange, vectorize
+except ImportError:
+    njit = _nocompile
+    vectorize = _nocompile
+    prange = range
+    USE_NUMBA = False
+else:
+    USE_NUMBA = True
+
+# fastmath flags for the numba kernels, leaving out 'nnan' and 'ninf' so that
+# NaN inputs (e.g. from NaT) still come out as NaN
+FASTMATH = {'contract', 'afn', 'reassoc', 'arcp', 'nsz'}
+
+try:
+    import numexpr
+except ImportError:
+    USE_NUMEXPR = False
+else:
+    # without Intel VML, numexpr evaluates sin/cos through scalar libm calls,
+    # which is slower than numpy's own SIMD loops
+    USE_NUMEXPR = numexpr.use_vml
+
+
+NS_PER_S = 1.e9  # nanoseconds per second
+NS_PER_HR = NS_PER_S * 3600.  # nanoseconds per hour
+
+# day angle offsets in radians of 80 days (vernal equinox, pvcdrom equation of
+# time) and 285 days (Cooper 1969 declination)
+_VERNAL_OFFSET_RAD = (2.0 * math.pi / 365.0) * 80.0
+_COOPER_OFFSET_RAD = (2.0 * math.pi / 365.0) * 285.0
 
 
+def get_solarposition(time, latitude, longitude,
                       altitude=None, pressure=None,
                       method='nrel_numpy',
                       temperature=12, **kwargs):
     """
     A convenience wrapper for the solar position calculators.
 
+    Parameters
+    ----------
     time : pandas.DatetimeIndex
         Must be localized or UTC will be assumed.
 
@@ -59,6 +102,10 @@ NS_PER_HR = 1.e9 * 3600.  # nanoseconds per hour
 
         'nrel_c' uses the NREL SPA C code [3]: :py:func:`spa_c`
 
+        'fast_spa' uses the optional ``fast_spa`` compiled extension for
+        the NREL SPA algorithm described in [1] if it is installed,
+        otherwise 'nrel_numpy'
+
     temperature : float, default 12
         Degrees C.
 
@@ -66,6 +113,18 @@ NS_PER_HR = 1.e9 * 3600.  # nanoseconds per hour
         Other keywords are passed to the solar position function
         specified by the ``method`` argument.
 
+    References
+    ----------
+    .. [1] I. Reda and A. Andreas, Solar position algorithm for solar radiation
+       applications. Solar Energy, vol. 76, no. 5, pp. 577-589, 2004.
+
+    .. [2] I. Reda and A. Andreas, Corrigendum to Solar position algorithm for
+       solar radiation applications. Solar Energy, vol. 81, no. 6, p. 838,
+       2007.
+
+    .. [3] NREL SPA code: http://rredc.nrel.gov/solar/codesandalgorithms/spa/
+    """
+
     if altitude is None and pressure is None:
         altitude = 0.
         pressure = 101325.
@@ -76,6 +135,10 @@ NS_PER_HR = 1.e9 * 3600.  # nanoseconds per hour
 
     method = method.lower()
     if isinstance(time, dt.datetime):
+        if method == 'ephemeris' and not kwargs and time is not pd.NaT:
+            # skip the DatetimeIndex machinery for a single timestamp
+            return _ephemeris_scalar(time, latitude, longitude, pressure,
+                                     temperature)
         time = pd.DatetimeIndex([time, ])
 
     if method == 'nrel_c':
@@ -97,13 +160,16 @@ NS_PER_HR = 1.e9 * 3600.  # nanoseconds per hour
     elif method == 'ephemeris':
         ephem_df = ephemeris(time, latitude, longitude, pressure, temperature,
                              **kwargs)
+    elif method == 'fast_spa':
+        ephem_df = _spa_fast(time, latitude, longitude, altitude, pressure,
+                             temperature, **kwargs)
     else:
         raise ValueError('Invalid solar position method')
 
     return ephem_df
 
 
-
+def spa_c(time, latitude, longitude, pressure=101325, altitude=0,
           temperature=12, delta_t=67.0,
           raw_spa_output=False):
     """
@@ -117,6 +183,8 @@ NS_PER_HR = 1.e9 * 3600.  # nanoseconds per hour
 
     This function is slower and no more accurate than :py:func:`spa_python`.
 
+    Parameters
+    ----------
     time : pandas.DatetimeIndex
         Must be localized or UTC will be assumed.
     latitude : float
@@ -137,6 +205,8 @@ NS_PER_HR = 1.e9 * 3600.  # nanoseconds per hour
     raw_spa_output : bool, default False
         If true, returns the raw SPA output.
 
+    Returns
+    -------
     DataFrame
         The DataFrame will have the following columns:
         elevation,
@@ -145,48 +215,80 @@ NS_PER_HR = 1.e9 * 3600.  # nanoseconds per hour
         apparent_elevation,
         apparent_zenith.
 
+    References
+    ----------
+    .. [1] NREL SPA reference:
+       http://rredc.nrel.gov/solar/codesandalgorithms/spa/
+       NREL SPA C files: https://midcdmz.nrel.gov/spa/
 
     Note: The ``timezone`` field in the SPA C files is replaced with
     ``time_zone`` to avoid a nameclash with the function ``__timezone`` that is
     redefined by Python>=3.5. This issue is
     `Python bug 24643 <https://bugs.python.org/issue24643>`_.
+
+    .. [2] USNO delta T:
+       http://www.usno.navy.mil/USNO/earth-orientation/eo-products/long-term
+
+    See also
     --------
     pyephem, spa_python, ephemeris
     """
 
+    # Added by Rob Andrews (@Calama-Consulting), Calama Consulting, 2014
+    # Edited by Will Holmgren (@wholmgren), University of Arizona, 2014
+    # Edited by Tony Lorenzo (@alorenzo175), University of Arizona, 2015
+
     try:
         from pvlib.spa_c_files.spa_py import spa_calc
     except ImportError:
         raise ImportError('Could not import built-in SPA calculator. ' +
                           'You may need to recompile the SPA code.')
 
+    # if localized, convert to UTC. otherwise, assume UTC.
     try:
         time_utc = time.tz_convert('UTC')
     except TypeError:
         time_utc = time
 
-    spa_out = []
-
-    for date in time_utc:
-        spa_out.append(spa_calc(year=date.year,
-                                month=date.month,
-                                day=date.day,
-                                hour=date.hour,
-                                minute=date.minute,
-                                second=date.second,
-                                time_zone=0,  # date uses utc time
-                                latitude=latitude,
-                                longitude=longitude,
-                                elevation=altitude,
-                                pressure=pressure / 100,
-                                temperature=temperature,
-                                delta_t=delta_t
-                                ))
+    # extract the date components once as arrays instead of going through
+    # Timestamp attribute access on every iteration
+    years = time_utc.year.values
+    months = time_utc.month.values
+    days = time_utc.day.values
+    hours = time_utc.hour.values
+    minutes = time_utc.minute.values
+    seconds = time_utc.second.values
+
+    n = len(time_utc)
+    spa_out = {}
+
+    for i in range(n):
+        spa = spa_calc(year=years[i],
+                       month=months[i],
+                       day=days[i],
+                       hour=hours[i],
+                       minute=minutes[i],
+                       second=seconds[i],
+                       time_zone=0,  # date uses utc time
+                       latitude=latitude,
+                       longitude=longitude,
+                       elevation=altitude,
+                       pressure=pressure / 100,
+                       temperature=temperature,
+                       delta_t=delta_t
+                       )
+        # fill preallocated column arrays rather than collecting a list
+        # of dicts for the DataFrame constructor to unpack
+        for key, value in spa.items():
+            if key not in spa_out:
+                spa_out[key] = np.empty(n, dtype=np.asarray(value).dtype)
+            spa_out[key][i] = value
 
     spa_df = pd.DataFrame(spa_out, index=time)
 
     if raw_spa_output:
-spa_c_files.spa_py.spa_calc()
+        # rename "time_zone" from raw output from spa_c_files.spa_py.spa_calc()
+        # to "timezone" to match the API of pvlib.solarposition.spa_c()
         return spa_df.rename(columns={'time_zone': 'timezone'})
     else:
         dfout = pd.DataFrame({'azimuth': spa_df['azimuth'],
@@ -198,36 +300,84 @@ spa_c_files.spa_py.spa_calc()
         return dfout
 
 
+# independently loaded copies of pvlib.spa, keyed by 'numpy' or 'numba'
+_SPA_CACHE = {}
+
 
 def _spa_python_import(how):
     """Compile spa.py appropriately"""
 
-    from pvlib import spa
-
-    using_numba = spa.USE_NUMBA
-
-    if how == 'numpy' and using_numba:
-        # the spa module was compiled to numba code, so we need to
-        # reload the module without compiling
-        # the PVLIB_USE_NUMBA env variable is used to tell the module
-        # to not compile with numba
-        warnings.warn('Reloading spa to use numpy')
-        os.environ['PVLIB_USE_NUMBA'] = '0'
-        spa = reload(spa)
-        del os.environ['PVLIB_USE_NUMBA']
-    elif how == 'numba' and not using_numba:
-        # The spa module was not compiled to numba code, so set
-        # PVLIB_USE_NUMBA so it does compile to numba on reload.
-        warnings.warn('Reloading spa to use numba')
-        os.environ['PVLIB_USE_NUMBA'] = '1'
-        spa = reload(spa)
-        del os.environ['PVLIB_USE_NUMBA']
+    if how in _SPA_CACHE:
+        return _SPA_CACHE[how]
     elif how != 'numba' and how != 'numpy':
         raise ValueError("how must be either 'numba' or 'numpy'")
 
+    # execute a private copy of the spa module for each variant rather than
+    # reloading pvlib.spa in place, so that switching between numpy and
+    # numba does not re-execute (and for numba, recompile) the module on
+    # every switch. the PVLIB_USE_NUMBA env variable tells the module
+    # whether to compile with numba
+    spec = importlib.util.find_spec('pvlib.spa')
+    spa = importlib.util.module_from_spec(spec)
+    use_numba = os.environ.get('PVLIB_USE_NUMBA')
+    os.environ['PVLIB_USE_NUMBA'] = '1' if how == 'numba' else '0'
+    try:
+        spec.loader.exec_module(spa)
+    finally:
+        if use_numba is None:
+            del os.environ['PVLIB_USE_NUMBA']
+        else:
+            os.environ['PVLIB_USE_NUMBA'] = use_numba
+
+    _SPA_CACHE[how] = spa
     return spa
 
 
+# delta t arrays from _calculate_deltat keyed by id() of their DatetimeIndex.
+# an entry is dropped when its index is garbage collected
+_DELTAT_CACHE = {}
+
+
+def _calculate_deltat(time, spa):
+    """
+    spa.calculate_deltat for the years and months of time, reusing the
+    result when called again with the same DatetimeIndex object.
+    """
+    key = id(time)
+    if key in _DELTAT_CACHE:
+        ref, delta_t = _DELTAT_CACHE[key]
+        if ref() is time:
+            return delta_t
+
+    delta_t = spa.calculate_deltat(time.year.values, time.month.values)
+
+    def _evict(_, key=key):
+        _DELTAT_CACHE.pop(key, None)
+
+    _DELTAT_CACHE[key] = (weakref.ref(time, _evict), delta_t)
+    return delta_t
+
+
+def _index_ns(dtindex):
+    """
+    Integer nanoseconds since the epoch of a pandas.DatetimeIndex.
+
+    asi8 is in the unit of the index, which since pandas 2 may be coarser
+    than nanoseconds (microseconds being the default of pandas 3), so
+    other units are converted first.
+    """
+    if getattr(dtindex, 'unit', 'ns') != 'ns':
+        dtindex = dtindex.as_unit('ns')
+    return dtindex.asi8
+
+
+def _datetime_to_unixtime(dtindex):
+    """Convert a pandas.DatetimeIndex to a float array of unix seconds"""
+    # asi8 is already an int64 ndarray, so no extra copy is needed
+    return _index_ns(dtindex) / NS_PER_S
+
+
+def spa_python(time, latitude, longitude,
                altitude=0, pressure=101325, temperature=12, delta_t=67.0,
                atmos_refract=None, how='numpy', numthreads=4, **kwargs):
     """
@@ -236,6 +386,13 @@ def _spa_python_import(how):
 
     The details of the NREL SPA algorithm are described in [1]_.
 
+    If numba is installed, the functions can be compiled to
+    machine code and the function can be multithreaded.
+    Without numba, the function evaluates via numpy with
+    a slight performance hit.
+
+    Parameters
+    ----------
     time : pandas.DatetimeIndex
         Must be localized or UTC will be assumed.
     latitude : float
@@ -268,6 +425,8 @@ def _spa_python_import(how):
     numthreads : int, optional, default 4
         Number of threads to use if how == 'numba'.
 
+    Returns
+    -------
     DataFrame
         The DataFrame will have the following columns:
         apparent_zenith (degrees),
@@ -278,6 +437,24 @@ def _spa_python_import(how):
         equation_of_time (minutes).
 
 
+    References
+    ----------
+    .. [1] I. Reda and A. Andreas, Solar position algorithm for solar
+       radiation applications. Solar Energy, vol. 76, no. 5, pp. 577-589, 2004.
+
+    .. [2] I. Reda and A. Andreas, Corrigendum to Solar position algorithm for
+       solar radiation applications. Solar Energy, vol. 81, no. 6, p. 838,
+       2007.
+
+    .. [3] USNO delta T:
+       http://www.usno.navy.mil/USNO/earth-orientation/eo-products/long-term
+
+    See also
+    --------
+    pyephem, spa_c, ephemeris
+    """
+
+    # Added by Tony Lorenzo (@alorenzo175), University of Arizona, 2015
 
     lat = latitude
     lon = longitude
@@ -292,11 +469,12 @@ def _spa_python_import(how):
         except (TypeError, ValueError):
             time = pd.DatetimeIndex([time, ])
 
-    unixtime = np.array(time.view(np.int64)/10**9)
+    unixtime = _datetime_to_unixtime(time)
 
     spa = _spa_python_import(how)
 
-    delta_t = delta_t or spa.calculate_deltat(time.year, time.month)
+    if delta_t is None:
+        delta_t = _calculate_deltat(time, spa)
 
     app_zenith, zenith, app_elevation, elevation, azimuth, eot = \
         spa.solar_position(unixtime, lat, lon, elev, pressure, temperature,
@@ -311,9 +489,63 @@ def _spa_python_import(how):
     return result
 
 
+def _spa_fast(time, latitude, longitude, altitude=0, pressure=101325,
+              temperature=12, delta_t=67.0, atmos_refract=None, numthreads=4):
+    """
+    Calculate the solar position using the fastest available compiled
+    implementation of the NREL SPA algorithm.
+
+    If the optional ``fast_spa`` extension module is installed, its
+    ``solar_position`` function is used. It must accept the same arguments
+    and return the same values as ``pvlib.spa.solar_position``. Otherwise
+    this falls back to :py:func:`spa_python` with ``how='numpy'``, so that
+    the first call does not compile a numba copy of pvlib.spa.
+
+    Parameters and return value are the same as :py:func:`spa_python`.
+    """
+
+    try:
+        import fast_spa
+    except ImportError:
+        return spa_python(time, latitude, longitude, altitude, pressure,
+                          temperature, delta_t, atmos_refract, how='numpy',
+                          numthreads=numthreads)
+
+    pressure = pressure / 100  # pressure must be in millibars for calculation
+
+    atmos_refract = atmos_refract or 0.5667
+
+    if not isinstance(time, pd.DatetimeIndex):
+        try:
+            time = pd.DatetimeIndex(time)
+        except (TypeError, ValueError):
+            time = pd.DatetimeIndex([time, ])
+
+    unixtime = _datetime_to_unixtime(time)
+
+    # fast_spa does not provide delta t, so use the numpy spa for that
+    if delta_t is None:
+        delta_t = _calculate_deltat(time, _spa_python_import('numpy'))
+
+    app_zenith, zenith, app_elevation, elevation, azimuth, eot = \
+        fast_spa.solar_position(unixtime, latitude, longitude, altitude,
+                                pressure, temperature, delta_t, atmos_refract,
+                                numthreads)
+
+    result = pd.DataFrame({'apparent_zenith': app_zenith, 'zenith': zenith,
+                           'apparent_elevation': app_elevation,
+                           'elevation': elevation, 'azimuth': azimuth,
+                           'equation_of_time': eot},
+                          index=time)
+
+    return result
+
 
+def sun_rise_set_transit_spa(times, latitude, longitude, how='numpy',
                              delta_t=67.0, numthreads=4):
     """
+    Calculate the sunrise, sunset, and sun transit times using the
+    NREL SPA algorithm.
 
     The details of the NREL SPA algorithm are described in [1]_.
 
@@ -321,6 +553,9 @@ def _spa_python_import(how):
     machine code and the function can be multithreaded.
     Without numba, the function evaluates via numpy with
     a slight performance hit.
+
+    Parameters
+    ----------
     times : pandas.DatetimeIndex
         Must be localized to the timezone for ``latitude`` and ``longitude``.
     latitude : float
@@ -348,58 +583,72 @@ def _spa_python_import(how):
         index is the same as input `times` argument
         columns are 'sunrise', 'sunset', and 'transit'
 
+    References
+    ----------
+    .. [1] Reda, I., Andreas, A., 2003. Solar position algorithm for solar
+       radiation applications. Technical report: NREL/TP-560- 34302. Golden,
+       USA, http://www.nrel.gov.
+    """
+    # Added by Tony Lorenzo (@alorenzo175), University of Arizona, 2015
 
     lat = latitude
     lon = longitude
 
+    # times must be localized
     if times.tz:
         tzinfo = times.tz
     else:
         raise ValueError('times must be localized')
 
+    # must convert to midnight UTC on day of interest
     utcday = pd.DatetimeIndex(times.date).tz_localize('UTC')
-    unixtime = np.array(utcday.view(np.int64)/10**9)
+    unixtime = _datetime_to_unixtime(utcday)
 
     spa = _spa_python_import(how)
 
-    delta_t = delta_t or spa.calculate_deltat(times.year, times.month)
+    if delta_t is None:
+        delta_t = _calculate_deltat(times, spa)
 
     transit, sunrise, sunset = spa.transit_sunrise_sunset(
         unixtime, lat, lon, delta_t, numthreads)
 
+    # arrays are in seconds since epoch format, need to conver to timestamps.
+    # keep them as DatetimeIndex so the columns are datetime64[ns, tz]
+    # rather than object arrays of Timestamps
     transit = pd.to_datetime(transit*1e9, unit='ns', utc=True).tz_convert(
-        tzinfo).tolist()
+        tzinfo)
     sunrise = pd.to_datetime(sunrise*1e9, unit='ns', utc=True).tz_convert(
-        tzinfo).tolist()
+        tzinfo)
     sunset = pd.to_datetime(sunset*1e9, unit='ns', utc=True).tz_convert(
-        tzinfo).tolist()
+        tzinfo)
 
     return pd.DataFrame(index=times, data={'sunrise': sunrise,
                                            'sunset': sunset,
                                            'transit': transit})
 
 
-
 def _ephem_convert_to_seconds_and_microseconds(date):
-    """Converts a PyEphem date into seconds"""
-    microseconds = int(round(24 * 60 * 60 * 1000000 * date))
-    seconds, microseconds = divmod(microseconds, 1000000)
+    # utility from unreleased PyEphem 3.6.7.1, vectorized over arrays
+    """Converts PyEphem dates into seconds"""
+    microseconds = np.rint(24 * 60 * 60 * 1000000 *
+                           np.asarray(date, dtype=np.float64))
+    seconds, microseconds = np.divmod(microseconds.astype(np.int64), 1000000)
     seconds -= 2209032000  # difference between epoch 1900 and epoch 1970
     return seconds, microseconds
 
 
-def _ephem_to_timezone(date, tzinfo):
-    # utility from unreleased PyEphem 3.6.7.1
-    """"Convert a PyEphem Date into a timezone aware python datetime"""
+def _ephem_to_datetime64(date):
+    """Convert PyEphem Dates into UTC numpy datetime64[ns]"""
     seconds, microseconds = _ephem_convert_to_seconds_and_microseconds(date)
-    date = dt.datetime.fromtimestamp(seconds, tzinfo)
-    date = date.replace(microsecond=microseconds)
-    return date
+    # nanoseconds like the other rise/set functions, not microseconds
+    return ((seconds * 1000000 + microseconds) * 1000).astype(
+        'datetime64[ns]')
 
 
 def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
                  horizon):
     import ephem
+    # initialize a PyEphem observer
     obs = ephem.Observer()
     obs.lat = str(latitude)
     obs.lon = str(longitude)
@@ -413,6 +662,7 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
     return obs, sun
 
 
+def sun_rise_set_transit_ephem(times, latitude, longitude,
                                next_or_previous='next',
                                altitude=0,
                                pressure=101325,
@@ -444,11 +694,13 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
         geometrical horizon
 
     Returns
+    -------
     pandas.DataFrame
         index is the same as input `time` argument
         columns are 'sunrise', 'sunset', and 'transit'
 
     See also
+    --------
     pyephem
     """
 
@@ -478,28 +730,70 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
         raise ValueError("next_or_previous must be either 'next' or" +
                          " 'previous'")
 
-    sunrise = []
-    sunset = []
-    trans = []
-    for thetime in times:
+    # keep the raw PyEphem dates (floats) and convert them all at once after
+    # the loop, then localize each column once
+    sunrise = np.empty(len(times))
+    sunset = np.empty(len(times))
+    trans = np.empty(len(times))
+    for i, thetime in enumerate(times):
         thetime = thetime.to_pydatetime()
         # pyephem drops timezone when converting to its internal datetime
         # format, so handle timezone explicitly here
         obs.date = ephem.Date(thetime - thetime.utcoffset())
-        sunrise.append(_ephem_to_timezone(rising(sun), tzinfo))
-        sunset.append(_ephem_to_timezone(setting(sun), tzinfo))
-        trans.append(_ephem_to_timezone(transit(sun), tzinfo))
+        sunrise[i] = rising(sun)
+        sunset[i] = setting(sun)
+        trans[i] = transit(sun)
 
-    return pd.DataFrame(index=times, data={'sunrise': sunrise,
-                                           'sunset': sunset,
-                                           'transit': trans})
+    def _to_tz(dates):
+        utc = pd.DatetimeIndex(_ephem_to_datetime64(dates))
+        return utc.tz_localize('UTC').tz_convert(tzinfo)
 
+    return pd.DataFrame(index=times, data={'sunrise': _to_tz(sunrise),
+                                           'sunset': _to_tz(sunset),
+                                           'transit': _to_tz(trans)})
 
 
-            temperature=12, horizon='+0:00'):
+def _pyephem_positions(time_utc, latitude, longitude, altitude, pressure,
+                       temperature, horizon):
+    """
+    Apparent and true (p=0) sun altitude and azimuth in radians at each
+    of time_utc, computed with a single PyEphem observer.
+    """
+    import ephem
+
+    obs, sun = _ephem_setup(latitude, longitude, altitude,
+                            pressure, temperature, horizon)
+
+    # fill arrays of the sun's altitude and azimuth in a single pass.
+    # the pressure and temperature corrected apparent alt/az is computed
+    # first, then it is redone for p=0 to get no atmosphere alt/az.
+    apparent_pressure = obs.pressure
+    n = len(time_utc)
+    app_alts = np.empty(n)
+    app_azis = np.empty(n)
+    alts = np.empty(n)
+    azis = np.empty(n)
+    for i, thetime in enumerate(time_utc):
+        obs.date = ephem.Date(thetime)
+        obs.pressure = apparent_pressure
+        sun.compute(obs)
+        app_alts[i] = sun.alt
+        app_azis[i] = sun.az
+        obs.pressure = 0
+        sun.compute(obs)
+        alts[i] = sun.alt
+        azis[i] = sun.az
+
+    return app_alts, app_azis, alts, azis
+
+
+def pyephem(time, latitude, longitude, altitude=0, pressure=101325,
+            temperature=12, horizon='+0:00', processes=1):
     """
     Calculate the solar position using the PyEphem package.
 
+    Parameters
+    ----------
     time : pandas.DatetimeIndex
         Must be localized or UTC will be assumed.
     latitude : float
@@ -520,6 +814,16 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
         geometrical horizon to define sunrise and sunset,
         horizon='-0:34' for when the sun's upper edge crosses the
         geometrical horizon
+    processes : int, optional, default 1
+        Number of worker processes used to run PyEphem in parallel. The
+        workers are spawned rather than forked, since forking a process
+        that has run multithreaded numba code can hang, so scripts calling
+        this with ``processes > 1`` need an ``if __name__ == '__main__':``
+        guard. Each worker re-imports numpy, pandas, pvlib and numba before
+        doing any work, which takes seconds, while PyEphem needs some tens
+        of microseconds per timestamp. Multiple processes therefore only
+        pay off for several hundred thousand timestamps, and only with as
+        many idle cores.
 
     Returns
     -------
@@ -535,50 +839,154 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
     spa_python, spa_c, ephemeris
     """
 
+    # Written by Will Holmgren (@wholmgren), University of Arizona, 2014
     try:
-        import ephem
+        import ephem  # noqa: F401
     except ImportError:
         raise ImportError('PyEphem must be installed')
 
+    # if localized, convert to UTC. otherwise, assume UTC.
     try:
         time_utc = time.tz_convert('UTC')
     except TypeError:
         time_utc = time
 
-    sun_coords = pd.DataFrame(index=time)
+    args = (latitude, longitude, altitude, pressure, temperature, horizon)
+
+    # never more workers than timestamps
+    processes = min(processes, len(time_utc))
+    if processes > 1:
+        # PyEphem holds the GIL, so split the times across processes
+        # rather than threads. each worker sets up its own observer.
+        import multiprocessing
+        bounds = np.linspace(0, len(time_utc), processes + 1).astype(int)
+        chunks = [(time_utc[start:stop], ) + args
+                  for start, stop in zip(bounds[:-1], bounds[1:])]
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(processes) as pool:
+            results = pool.starmap(_pyephem_positions, chunks)
+        app_alts, app_azis, alts, azis = (
+            np.concatenate(arrays) for arrays in zip(*results))
+    else:
+        app_alts, app_azis, alts, azis = _pyephem_positions(time_utc, *args)
 
-    obs, sun = _ephem_setup(latitude, longitude, altitude,
-                            pressure, temperature, horizon)
+    # convert to degrees in place. add zenith
+    for arr in (app_alts, app_azis, alts, azis):
+        np.rad2deg(arr, out=arr)
 
-    alts = []
-    azis = []
-    for thetime in time_utc:
-        obs.date = ephem.Date(thetime)
-        sun.compute(obs)
-        alts.append(sun.alt)
-        azis.append(sun.az)
+    sun_coords = pd.DataFrame({'apparent_elevation': app_alts,
+                               'apparent_azimuth': app_azis,
+                               'elevation': alts,
+                               'azimuth': azis,
+                               'apparent_zenith': 90 - app_alts,
+                               'zenith': 90 - alts},
+                              index=time)
 
-    sun_coords['apparent_elevation'] = alts
-    sun_coords['apparent_azimuth'] = azis
+    return sun_coords
 
-    obs.pressure = 0
-    alts = []
-    azis = []
-    for thetime in time_utc:
-        obs.date = ephem.Date(thetime)
-        sun.compute(obs)
-        alts.append(sun.alt)
-        azis.append(sun.az)
 
-    sun_coords['elevation'] = alts
-    sun_coords['azimuth'] = azis
-    sun_coords = np.rad2deg(sun_coords)
-    sun_coords['apparent_zenith'] = 90 - sun_coords['apparent_elevation']
-    sun_coords['zenith'] = 90 - sun_coords['elevation']
+# Kepler's equation E = M + e*sin(E) is solved by fixed-point iteration,
+# which contracts by a factor of e ~= 0.0167 on every pass. Five passes
+# starting from E = M leave an error below 1e-7 degrees.
+KEPLER_ITERATIONS = 5
 
-    return sun_coords
 
+# a serial loop: the fused per element pass is where the gain comes from,
+# and starting numba's threading layer on this default path would make
+# later forked processes hang on exit
+@njit(cache=True, fastmath=FASTMATH)
+def _ephemeris_loop(Yr, UnivDate, UnivHr, SinLat, CosLat, Longitude, pressure,
+                    temperature):
+    """Elementwise version of the ephemeris calculation, compiled by numba"""
+    n = UnivHr.shape[0]
+    ApparentSunEl = np.empty(n)
+    SunEl = np.empty(n)
+    SunAz = np.empty(n)
+    SolarTime = np.empty(n)
 
+    Abber = 20 / 3600.
+
+    for i in range(n):
+        YrBegin = 365 * Yr[i] + math.floor((Yr[i] - 1) / 4.) - 0.5
+
+        Ezero = YrBegin + UnivDate[i]
+        T = Ezero / 36525.
+
+        GMST0 = 6 / 24. + 38 / 1440. + (
+            45.836 + 8640184.542 * T + 0.0929 * T ** 2) / 86400.
+        GMST0 = 360 * (GMST0 - math.floor(GMST0))
+        GMSTi = (GMST0 + 360 * (1.0027379093 * UnivHr[i] / 24.)) % 360
+
+        LocAST = (360 + GMSTi - Longitude) % 360
+
+        EpochDate = Ezero + UnivHr[i] / 24.
+        T1 = EpochDate / 36525.
+
+        ObliquityR = math.radians(
+            23.452294 - 0.0130125 * T1 - 1.64e-06 * T1 ** 2 +
+            5.03e-07 * T1 ** 3)
+        MlPerigee = (281.22083 + 4.70684e-05 * EpochDate +
+                     0.000453 * T1 ** 2 + 3e-06 * T1 ** 3)
+        MeanAnom = (358.47583 + 0.985600267 * EpochDate - 0.00015 *
+                    T1 ** 2 - 3e-06 * T1 ** 3) % 360
+        Eccen = 0.01675104 - 4.18e-05 * T1 - 1.26e-07 * T1 ** 2
+        EccenAnom = MeanAnom
+        for _ in range(KEPLER_ITERATIONS):
+            EccenAnom = (MeanAnom +
+                         math.degrees(Eccen)*math.sin(math.radians(EccenAnom)))
+
+        TrueAnom = 2 * (math.degrees(math.atan2(
+            ((1 + Eccen) / (1 - Eccen)) ** 0.5 *
+            math.tan(math.radians(EccenAnom) / 2.), 1)) % 360)
+        EcLon = (MlPerigee + TrueAnom) % 360 - Abber
+        EcLonR = math.radians(EcLon)
+        SinEcLon = math.sin(EcLonR)
+        DecR = math.asin(math.sin(ObliquityR)*SinEcLon)
+
+        RtAscen = math.degrees(math.atan2(
+            math.cos(ObliquityR)*SinEcLon, math.cos(EcLonR)))
+
+        HrAngle = LocAST - RtAscen
+        HrAngleR = math.radians(HrAngle)
+        HrAngle = (HrAngle + 180.) % 360. - 180.
+
+        Az = math.degrees(math.atan2(-math.sin(HrAngleR),
+                                     CosLat*math.tan(DecR) -
+                                     SinLat*math.cos(HrAngleR)))
+        if Az < 0:
+            Az += 360
+
+        Elevation = math.degrees(math.asin(
+            CosLat * math.cos(DecR) * math.cos(HrAngleR) +
+            SinLat * math.sin(DecR)))
+
+        # refraction correction, branches as in the vectorized version
+        TanEl = math.tan(math.radians(Elevation))
+        if Elevation > 5 and Elevation <= 85:
+            Refract = 58.1/TanEl - 0.07/(TanEl**3) + 8.6e-05/(TanEl**5)
+        elif Elevation > -0.575 and Elevation <= 5:
+            Refract = (
+                Elevation *
+                (-518.2 + Elevation*(103.4 + Elevation*(-12.79 +
+                                                        Elevation*0.711))) +
+                1735)
+        elif Elevation > -1 and Elevation <= -0.575:
+            Refract = -20.774 / TanEl
+        else:
+            Refract = 0.
+
+        Refract *= ((283/(273. + temperature[i])) * (pressure[i]/101325.) /
+                    3600.)
+
+        ApparentSunEl[i] = Elevation + Refract
+        SunEl[i] = Elevation
+        SunAz[i] = Az
+        SolarTime[i] = (180 + HrAngle) / 15.
+
+    return ApparentSunEl, SunEl, SunAz, SolarTime
+
+
+def ephemeris(time, latitude, longitude, pressure=101325, temperature=12):
     """
     Python-native solar position calculator.
     The accuracy of this code is not guaranteed.
@@ -602,17 +1010,56 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
     Returns
     -------
 
+    DataFrame with the following columns:
+
+        * apparent_elevation : apparent sun elevation accounting for
+          atmospheric refraction.
+        * elevation : actual elevation (not accounting for refraction)
+          of the sun in decimal degrees, 0 = on horizon.
+          The complement of the zenith angle.
+        * azimuth : Azimuth of the sun in decimal degrees East of North.
+          This is the complement of the apparent zenith angle.
+        * apparent_zenith : apparent sun zenith accounting for atmospheric
+          refraction.
+        * zenith : Solar zenith angle
+        * solar_time : Solar time in decimal hours (solar noon is 12.00).
 
+    References
+    -----------
+
+    .. [1] Grover Hughes' class and related class materials on Engineering
+       Astronomy at Sandia National Laboratories, 1985.
+
+    See also
+    --------
     pyephem, spa_c, spa_python
 
     """
 
+    # Added by Rob Andrews (@Calama-Consulting), Calama Consulting, 2014
+    # Edited by Will Holmgren (@wholmgren), University of Arizona, 2014
+
+    # Most comments in this function are from PVLIB_MATLAB or from
+    # pvlib-python's attempt to understand and fix problems with the
+    # algorithm. The comments are *not* based on the reference material.
+    # This helps a little bit:
+    # http://www.cv.nrao.edu/~rfisher/Ephemerides/times.html
+
+    # the inversion of longitude is due to the fact that this code was
+    # originally written for the convention that positive longitude were for
+    # locations west of the prime meridian. However, the correct convention (as
+    # of 2009) is to use negative longitudes for locations west of the prime
+    # meridian. Therefore, the user should input longitude values under the
+    # correct convention (e.g. Albuquerque is at -106 longitude), but it needs
+    # to be inverted for use in the code.
 
     Latitude = latitude
     Longitude = -1 * longitude
 
     Abber = 20 / 3600.
     LatR = np.radians(Latitude)
+    SinLat = np.sin(LatR)
+    CosLat = np.cos(LatR)
 
     # the SPA algorithm needs time to be expressed in terms of
     # decimal UTC hours of the day of the year.
@@ -623,105 +1070,167 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
     except TypeError:
         time_utc = time
 
-    # strip out the day of the year and calculate the decimal hour
-    DayOfYear = time_utc.dayofyear
-    DecHours = (time_utc.hour + time_utc.minute/60. + time_utc.second/3600. +
-                time_utc.microsecond/3600.e6)
-
-    # np.array needed for pandas > 0.20
-    UnivDate = np.array(DayOfYear)
-    UnivHr = np.array(DecHours)
-
-    Yr = np.array(time_utc.year) - 1900
-    YrBegin = 365 * Yr + np.floor((Yr - 1) / 4.) - 0.5
-
-    Ezero = YrBegin + UnivDate
-    T = Ezero / 36525.
-
-    # Calculate Greenwich Mean Sidereal Time (GMST)
-    GMST0 = 6 / 24. + 38 / 1440. + (
-        45.836 + 8640184.542 * T + 0.0929 * T ** 2) / 86400.
-    GMST0 = 360 * (GMST0 - np.floor(GMST0))
-    GMSTi = np.mod(GMST0 + 360 * (1.0027379093 * UnivHr / 24.), 360)
-
-    # Local apparent sidereal time
-    LocAST = np.mod((360 + GMSTi - Longitude), 360)
-
-    EpochDate = Ezero + UnivHr / 24.
-    T1 = EpochDate / 36525.
-
-    ObliquityR = np.radians(
-        23.452294 - 0.0130125 * T1 - 1.64e-06 * T1 ** 2 + 5.03e-07 * T1 ** 3)
-    MlPerigee = 281.22083 + 4.70684e-05 * EpochDate + 0.000453 * T1 ** 2 + (
-        3e-06 * T1 ** 3)
-    MeanAnom = np.mod((358.47583 + 0.985600267 * EpochDate - 0.00015 *
-                       T1 ** 2 - 3e-06 * T1 ** 3), 360)
-    Eccen = 0.01675104 - 4.18e-05 * T1 - 1.26e-07 * T1 ** 2
-    EccenAnom = MeanAnom
-    E = 0
-
-    while np.max(abs(EccenAnom - E)) > 0.0001:
-        E = EccenAnom
-        EccenAnom = MeanAnom + np.degrees(Eccen)*np.sin(np.radians(E))
-
-    TrueAnom = (
-        2 * np.mod(np.degrees(np.arctan2(((1 + Eccen) / (1 - Eccen)) ** 0.5 *
-                   np.tan(np.radians(EccenAnom) / 2.), 1)), 360))
-    EcLon = np.mod(MlPerigee + TrueAnom, 360) - Abber
-    EcLonR = np.radians(EcLon)
-    DecR = np.arcsin(np.sin(ObliquityR)*np.sin(EcLonR))
-
-    RtAscen = np.degrees(np.arctan2(np.cos(ObliquityR)*np.sin(EcLonR),
-                                    np.cos(EcLonR)))
-
-    HrAngle = LocAST - RtAscen
-    HrAngleR = np.radians(HrAngle)
-    HrAngle = HrAngle - (360 * (abs(HrAngle) > 180))
-
-    SunAz = np.degrees(np.arctan2(-np.sin(HrAngleR),
-                                  np.cos(LatR)*np.tan(DecR) -
-                                  np.sin(LatR)*np.cos(HrAngleR)))
-    SunAz[SunAz < 0] += 360
-
-    SunEl = np.degrees(np.arcsin(
-        np.cos(LatR) * np.cos(DecR) * np.cos(HrAngleR) +
-        np.sin(LatR) * np.sin(DecR)))
-
-    SolarTime = (180 + HrAngle) / 15.
-
-    # Calculate refraction correction
-    Elevation = SunEl
-    TanEl = pd.Series(np.tan(np.radians(Elevation)), index=time_utc)
-    Refract = pd.Series(0, index=time_utc)
-
-    Refract[(Elevation > 5) & (Elevation <= 85)] = (
-        58.1/TanEl - 0.07/(TanEl**3) + 8.6e-05/(TanEl**5))
-
-    Refract[(Elevation > -0.575) & (Elevation <= 5)] = (
-        Elevation *
-        (-518.2 + Elevation*(103.4 + Elevation*(-12.79 + Elevation*0.711))) +
-        1735)
-
-    Refract[(Elevation > -1) & (Elevation <= -0.575)] = -20.774 / TanEl
-
-    Refract *= (283/(273. + temperature)) * (pressure/101325.) / 3600.
-
-    ApparentSunEl = SunEl + Refract
-
-    # make output DataFrame
-    DFOut = pd.DataFrame(index=time_utc)
-    DFOut['apparent_elevation'] = ApparentSunEl
-    DFOut['elevation'] = SunEl
-    DFOut['azimuth'] = SunAz
-    DFOut['apparent_zenith'] = 90 - ApparentSunEl
-    DFOut['zenith'] = 90 - SunEl
-    DFOut['solar_time'] = SolarTime
-    DFOut.index = time
+    # strip out the day of the year and calculate the decimal hour. both
+    # come from the int64 nanoseconds in one pass rather than from the
+    # DatetimeIndex field accessors
+    ns = _index_ns(time_utc).view('M8[ns]')
+    day = ns.astype('M8[D]')
+    year = ns.astype('M8[Y]')
+    UnivDate = (day - year.astype('M8[D]')).astype(np.int64) + 1
+    UnivHr = (ns - day).astype(np.int64) / NS_PER_HR
+
+    Yr = year.astype(np.int64) + (1970 - 1900)
+
+    nat = np.isnat(ns)
+    if nat.any():
+        UnivDate = np.where(nat, np.nan, UnivDate)
+        UnivHr[nat] = np.nan
+        Yr = np.where(nat, np.nan, Yr)
+
+    if USE_NUMBA:
+        n = len(time_utc)
+        pressure = np.full(n, np.asarray(pressure, dtype=np.float64))
+        temperature = np.full(n, np.asarray(temperature, dtype=np.float64))
+        ApparentSunEl, SunEl, SunAz, SolarTime = _ephemeris_loop(
+            Yr, UnivDate, UnivHr, SinLat, CosLat, Longitude, pressure,
+            temperature)
+    else:
+        YrBegin = 365 * Yr + np.floor((Yr - 1) / 4.) - 0.5
+
+        Ezero = YrBegin + UnivDate
+        T = Ezero / 36525.
+
+        # Calculate Greenwich Mean Sidereal Time (GMST)
+        GMST0 = 6 / 24. + 38 / 1440. + (
+            45.836 + 8640184.542 * T + 0.0929 * T ** 2) / 86400.
+        GMST0 = 360 * (GMST0 - np.floor(GMST0))
+        GMSTi = np.mod(GMST0 + 360 * (1.0027379093 * UnivHr / 24.), 360)
+
+        # Local apparent sidereal time
+        LocAST = np.mod((360 + GMSTi - Longitude), 360)
+
+        EpochDate = Ezero + UnivHr / 24.
+        T1 = EpochDate / 36525.
+
+        ObliquityR = np.radians(
+            23.452294 - 0.0130125 * T1 - 1.64e-06 * T1 ** 2 +
+            5.03e-07 * T1 ** 3)
+        SinObl = np.sin(ObliquityR)
+        CosObl = np.cos(ObliquityR)
+        MlPerigee = 281.22083 + 4.70684e-05 * EpochDate + (
+            0.000453 * T1 ** 2 + 3e-06 * T1 ** 3)
+        MeanAnom = np.mod((358.47583 + 0.985600267 * EpochDate - 0.00015 *
+                           T1 ** 2 - 3e-06 * T1 ** 3), 360)
+        Eccen = 0.01675104 - 4.18e-05 * T1 - 1.26e-07 * T1 ** 2
+        # fixed number of fixed-point iterations of Kepler's equation, no
+        # convergence test over the whole array on every pass
+        EccenAnom = MeanAnom
+        for _ in range(KEPLER_ITERATIONS):
+            EccenAnom = (MeanAnom +
+                         np.degrees(Eccen)*np.sin(np.radians(EccenAnom)))
+
+        TrueAnom = (
+            2 * np.mod(np.degrees(np.arctan2(((1 + Eccen) / (1 - Eccen)) **
+                       0.5 * np.tan(np.radians(EccenAnom) / 2.), 1)), 360))
+        EcLon = np.mod(MlPerigee + TrueAnom, 360) - Abber
+        EcLonR = np.radians(EcLon)
+        SinEcLon = np.sin(EcLonR)
+        DecR = np.arcsin(SinObl*SinEcLon)
+
+        RtAscen = np.degrees(np.arctan2(CosObl*SinEcLon, np.cos(EcLonR)))
+
+        HrAngle = LocAST - RtAscen
+        HrAngleR = np.radians(HrAngle)
+        # wrap into [-180, 180) with one ufunc pass
+        HrAngle = np.mod(HrAngle + 180., 360.) - 180.
+
+        SunAz = np.degrees(np.arctan2(-np.sin(HrAngleR),
+                                      CosLat*np.tan(DecR) -
+                                      SinLat*np.cos(HrAngleR)))
+        SunAz[SunAz < 0] += 360
+
+        SunEl = np.degrees(np.arcsin(
+            CosLat * np.cos(DecR) * np.cos(HrAngleR) +
+            SinLat * np.sin(DecR)))
+
+        SolarTime = (180 + HrAngle) / 15.
+
+        # Calculate refraction correction
+        # each branch is only evaluated where its elevation range applies
+        Elevation = SunEl
+        TanEl = np.tan(np.radians(Elevation))
+        Refract = np.zeros_like(Elevation)
+
+        high = (Elevation > 5) & (Elevation <= 85)
+        TanElHigh = TanEl[high]
+        Refract[high] = (
+            58.1/TanElHigh - 0.07/(TanElHigh**3) + 8.6e-05/(TanElHigh**5))
+
+        low = (Elevation > -0.575) & (Elevation <= 5)
+        ElevationLow = Elevation[low]
+        Refract[low] = (
+            ElevationLow *
+            (-518.2 + ElevationLow*(103.4 + ElevationLow*(-12.79 +
+                                                          ElevationLow*0.711)))
+            + 1735)
+
+        below = (Elevation > -1) & (Elevation <= -0.575)
+        Refract[below] = -20.774 / TanEl[below]
+
+        # pressure and temperature may be Series, so take their values to
+        # keep Refract a plain array until the output DataFrame is built
+        RefractScale = np.asarray(
+            (283/(273. + temperature)) * (pressure/101325.) / 3600.)
+        Refract *= RefractScale
+
+        ApparentSunEl = SunEl + Refract
+
+    # make output DataFrame in one go from the plain arrays
+    DFOut = pd.DataFrame({'apparent_elevation': ApparentSunEl,
+                          'elevation': SunEl,
+                          'azimuth': SunAz,
+                          'apparent_zenith': 90 - ApparentSunEl,
+                          'zenith': 90 - SunEl,
+                          'solar_time': SolarTime},
+                         index=time)
 
     return DFOut
 
 
+def _ephemeris_scalar(time, latitude, longitude, pressure=101325,
+                      temperature=12):
+    """
+    :py:func:`ephemeris` for a single datetime. The date fields are read
+    directly from the datetime and the result is built as a one row
+    DataFrame, without going through DatetimeIndex accessors.
+    """
+    # if localized, convert to UTC. otherwise, assume UTC.
+    if time.tzinfo is None:
+        time_utc = time
+    else:
+        time_utc = time.astimezone(dt.timezone.utc)
 
+    Yr = np.array([time_utc.year - 1900])
+    UnivDate = np.array([time_utc.timetuple().tm_yday])
+    UnivHr = np.array([time_utc.hour + time_utc.minute/60. +
+                       time_utc.second/3600. + time_utc.microsecond/3600.e6])
+
+    LatR = math.radians(latitude)
+    ApparentSunEl, SunEl, SunAz, SolarTime = _ephemeris_loop(
+        Yr, UnivDate, UnivHr, math.sin(LatR), math.cos(LatR), -1 * longitude,
+        np.full(1, pressure, dtype=np.float64),
+        np.full(1, temperature, dtype=np.float64))
+
+    return pd.DataFrame({'apparent_elevation': ApparentSunEl,
+                         'elevation': SunEl,
+                         'azimuth': SunAz,
+                         'apparent_zenith': 90 - ApparentSunEl,
+                         'zenith': 90 - SunEl,
+                         'solar_time': SolarTime},
+                        index=pd.DatetimeIndex([time, ]))
+
+
+def calc_time(lower_bound, upper_bound, latitude, longitude, attribute, value,
               altitude=0, pressure=101325, temperature=12, horizon='+0:00',
               xtol=1.0e-12):
     """
@@ -773,24 +1282,67 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
         If the given attribute is not an attribute of a
         PyEphem.Sun object.
     """
+
     obs, sun = _ephem_setup(latitude, longitude, altitude,
                             pressure, temperature, horizon)
 
+    lb = datetime_to_djd(lower_bound)
+    ub = datetime_to_djd(upper_bound)
+
+    djd_root = _ephem_attr_root(obs, sun, lb, ub, attribute, value, xtol)
+
+    return djd_to_datetime(djd_root)
+
+
+def _ephem_attr_root(obs, sun, lb, ub, attribute, value, xtol):
+    """
+    Dublin Julian day between lb and ub where getattr(sun, attribute)
+    seen by obs equals value.
+    """
     def compute_attr(thetime, target, attr):
         obs.date = thetime
         sun.compute(obs)
         return getattr(sun, attr) - target
 
-    lb = datetime_to_djd(lower_bound)
-    ub = datetime_to_djd(upper_bound)
+    return so.brentq(compute_attr, lb, ub, (value, attribute), xtol=xtol)
 
-    djd_root = so.brentq(compute_attr, lb, ub,
-                         (value, attribute), xtol=xtol)
 
-    return djd_to_datetime(djd_root)
+def _calc_times_batch(lower_bounds, upper_bounds, latitude, longitude,
+                      attribute, values, altitude=0, pressure=101325,
+                      temperature=12, horizon='+0:00', xtol=1.0e-12):
+    """
+    :py:func:`calc_time` for many brackets at once.
 
+    `lower_bounds`, `upper_bounds` (sequences of datetime.datetime) and
+    `values` are broadcast against each other. One PyEphem observer is
+    set up for the whole batch and the roots are converted to times in
+    a single step.
 
+    Returns
+    -------
+    pandas.DatetimeIndex
+        Localized to UTC.
+    """
+
+    obs, sun = _ephem_setup(latitude, longitude, altitude,
+                            pressure, temperature, horizon)
+
+    lbs = np.array([datetime_to_djd(t) for t in np.atleast_1d(lower_bounds)])
+    ubs = np.array([datetime_to_djd(t) for t in np.atleast_1d(upper_bounds)])
+    lbs, ubs, values = np.broadcast_arrays(lbs, ubs, values)
 
+    djd_roots = np.empty(lbs.shape)
+    for i in range(len(djd_roots)):
+        djd_roots[i] = _ephem_attr_root(obs, sun, lbs[i], ubs[i], attribute,
+                                        values[i], xtol)
+
+    # the Dublin Julian day epoch is 1899-12-31 12:00 UTC
+    djd_ns = np.rint(djd_roots * (NS_PER_HR * 24.)).astype(np.int64)
+    return (pd.Timestamp('1899-12-31 12:00', tz='UTC') +
+            pd.to_timedelta(djd_ns, unit='ns'))
+
+
+def pyephem_earthsun_distance(time):
     """
     Calculates the distance from the earth to the sun using pyephem.
 
@@ -807,14 +1359,15 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
     import ephem
 
     sun = ephem.Sun()
-    earthsun = []
-    for thetime in time:
+    earthsun = np.empty(len(time))
+    for i, thetime in enumerate(time):
         sun.compute(ephem.Date(thetime))
-        earthsun.append(sun.earth_distance)
+        earthsun[i] = sun.earth_distance
 
     return pd.Series(earthsun, index=time)
 
 
+def nrel_earthsun_distance(time, how='numpy', delta_t=67.0, numthreads=4):
     """
     Calculates the distance from the earth to the sun using the
     NREL SPA algorithm.
@@ -848,6 +1401,12 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
     dist : pd.Series
         Earth-sun distance in AU.
 
+    References
+    ----------
+    .. [1] Reda, I., Andreas, A., 2003. Solar position algorithm for solar
+       radiation applications. Technical report: NREL/TP-560- 34302. Golden,
+       USA, http://www.nrel.gov.
+    """
 
     if not isinstance(time, pd.DatetimeIndex):
         try:
@@ -855,11 +1414,12 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
         except (TypeError, ValueError):
             time = pd.DatetimeIndex([time, ])
 
-    unixtime = np.array(time.view(np.int64)/10**9)
+    unixtime = _datetime_to_unixtime(time)
 
     spa = _spa_python_import(how)
 
-    delta_t = delta_t or spa.calculate_deltat(time.year, time.month)
+    if delta_t is None:
+        delta_t = _calculate_deltat(time, spa)
 
     dist = spa.earthsun_distance(unixtime, delta_t, numthreads)
 
@@ -868,7 +1428,6 @@ def _ephem_setup(latitude, longitude, altitude, pressure, temperature,
     return dist
 
 
-
 def _calculate_simple_day_angle(dayofyear, offset=1):
     """
     Calculates the day angle for the Earth's orbit around the Sun.
@@ -886,7 +1445,49 @@ def _calculate_simple_day_angle(dayofyear, offset=1):
     return (2. * np.pi / 365.) * (dayofyear - offset)
 
 
+def _as_dtype(values, dtype):
+    """
+    Cast numeric values to dtype, keeping Series as Series and scalars as
+    scalars.
+    """
+    try:
+        return values.astype(dtype, copy=False)
+    except AttributeError:
+        return np.asarray(values, dtype=dtype)[()]
+
+
+def equation_of_time_spencer71(dayofyear, dtype=np.float64):
+    """
+    Equation of time from Duffie & Beckman and attributed to Spencer
+    (1971) and Iqbal (1983).
+
+    The coefficients correspond to the online copy of the `Fourier
+    paper`_ [1]_ in the Sundial Mailing list that was posted in 1998 by
+    Mac Oglesby from his correspondence with Macquarie University Prof.
+    John Pickard who added the following note.
+
+        In the early 1970s, I contacted Dr Spencer about this method because I
+        was trying to use a hand calculator for calculating solar positions,
+        etc. He was extremely helpful and gave me a reprint of this paper. He
+        also pointed out an error in the original: in the series for E, the
+        constant was printed as 0.000075 rather than 0.0000075. I have
+        corrected the error in this version.
+
+    There appears to be another error in formula as printed in both
+    Duffie & Beckman's [2]_ and Frank Vignola's [3]_ books in which the
+    coefficient 0.04089 is printed instead of 0.040849, corresponding to
+    the value used in the Bird Clear Sky model implemented by Daryl
+    Myers [4]_ and printed in both the Fourier paper from the Sundial
+    Mailing List and R. Hulstrom's [5]_ book.
+
+    .. _Fourier paper: http://www.mail-archive.com/sundial@uni-koeln.de/msg01050.html
+
+    Parameters
+    ----------
     dayofyear : numeric
+    dtype : numpy dtype, default numpy.float64
+        Floating point type of the calculation. numpy.float32 halves the
+        memory traffic of long series at an error of about 1e-5 minutes.
 
     Returns
     -------
@@ -894,21 +1495,70 @@ def _calculate_simple_day_angle(dayofyear, offset=1):
         Difference in time between solar time and mean solar time in minutes.
 
     References
-    
+    ----------
+    .. [1] J. W. Spencer, "Fourier series representation of the position of the
+       sun" in Search 2 (5), p. 172 (1971)
+
+    .. [2] J. A. Duffie and W. A. Beckman,  "Solar Engineering of Thermal
+       Processes, 3rd Edition" pp. 9-11, J. Wiley and Sons, New York (2006)
 
+    .. [3] Frank Vignola et al., "Solar And Infrared Radiation Measurements",
+       p. 13, CRC Press (2012)
+
+    .. [4] Daryl R. Myers, "Solar Radiation: Practical Modeling for Renewable
+       Energy Applications", p. 5 CRC Press (2013)
+
+    .. [5] Roland Hulstrom, "Solar Resources" p. 66, MIT Press (1989)
+
+    See Also
+    --------
     equation_of_time_pvcdrom
     """
-    day_angle = _calculate_simple_day_angle(dayofyear)
+    double = np.dtype(dtype) == np.float64
+    if double and USE_NUMBA:
+        return _equation_of_time_spencer71(dayofyear)
+
+    # for single precision the day angle is cast once, so that every ufunc
+    # below runs its float32 loop
+    day_angle = _as_dtype(_calculate_simple_day_angle(dayofyear), dtype)
+    if double and USE_NUMEXPR and isinstance(day_angle, np.ndarray):
+        return numexpr.evaluate(
+            '(1440.0 / 2 / pi) * ('
+            '0.0000075 +'
+            '0.001868 * cos(day_angle) - 0.032077 * sin(day_angle) -'
+            '0.014615 * cos(2.0 * day_angle) -'
+            '0.040849 * sin(2.0 * day_angle))',
+            local_dict={'day_angle': day_angle, 'pi': np.pi})
+
     # convert from radians to minutes per day = 24[h/day] * 60[min/h] / 2 / pi
     eot = (1440.0 / 2 / np.pi) * (
         0.0000075 +
         0.001868 * np.cos(day_angle) - 0.032077 * np.sin(day_angle) -
         0.014615 * np.cos(2.0 * day_angle) - 0.040849 * np.sin(2.0 * day_angle)
     )
+    return _as_dtype(eot, dtype)
+
+
+# elementwise kernel of equation_of_time_spencer71 with numba, evaluating
+# each element in a single fused pass. the double angle terms come from
+# cos(2x) = cos(x)**2 - sin(x)**2 and sin(2x) = 2*sin(x)*cos(x), so only
+# one sin and one cos are evaluated per element
+@vectorize(['f8(i8)', 'f8(f8)'], cache=True, fastmath=FASTMATH)
+def _equation_of_time_spencer71(dayofyear):
+    day_angle = (2. * np.pi / 365.) * (dayofyear - 1)
+    cos_da = np.cos(day_angle)
+    sin_da = np.sin(day_angle)
+    # convert from radians to minutes per day = 24[h/day] * 60[min/h] / 2 / pi
+    eot = (1440.0 / 2 / np.pi) * (
+        0.0000075 +
+        0.001868 * cos_da - 0.032077 * sin_da -
+        0.014615 * (cos_da * cos_da - sin_da * sin_da) -
+        0.040849 * (2.0 * sin_da * cos_da)
+    )
     return eot
 
 
-
+def equation_of_time_pvcdrom(dayofyear):
     """
     Equation of time from PVCDROM.
 
@@ -926,17 +1576,22 @@ def _calculate_simple_day_angle(dayofyear, offset=1):
     equation_of_time : numeric
         Difference in time between solar time and mean solar time in minutes.
 
-    
+    References
+    ----------
+    .. [1] Soteris A. Kalogirou, "Solar Energy Engineering Processes and
+       Systems, 2nd Edition" Elselvier/Academic Press (2009).
+
+    See Also
+    --------
     equation_of_time_spencer71
     """
     # day angle relative to Vernal Equinox, typically March 22 (day number 81)
-    bday = \
-        _calculate_simple_day_angle(dayofyear) - (2.0 * np.pi / 365.0) * 80.0
+    bday = _calculate_simple_day_angle(dayofyear) - _VERNAL_OFFSET_RAD
     # same value but about 2x faster than Spencer (1971)
     return 9.87 * np.sin(2.0 * bday) - 7.53 * np.cos(bday) - 1.5 * np.sin(bday)
 
 
-
+def declination_spencer71(dayofyear, dtype=np.float64):
     """
     Solar declination from Duffie & Beckman and attributed to
     Spencer (1971) and Iqbal (1983).
@@ -949,6 +1604,9 @@ def _calculate_simple_day_angle(dayofyear, offset=1):
     Parameters
     ----------
     dayofyear : numeric
+    dtype : numpy dtype, default numpy.float64
+        Floating point type of the calculation. numpy.float32 halves the
+        memory traffic of long series at an error of about 1e-7 radians.
 
     Returns
     -------
@@ -956,18 +1614,87 @@ def _calculate_simple_day_angle(dayofyear, offset=1):
         Angular position of the sun at solar noon relative to the plane of the
         equator, approximately between +/-23.45 (degrees).
 
+    References
+    ----------
+    .. [1] J. A. Duffie and W. A. Beckman,  "Solar Engineering of Thermal
+       Processes, 3rd Edition" pp. 13-14, J. Wiley and Sons, New York (2006)
+
+    .. [2] J. W. Spencer, "Fourier series representation of the position of the
+       sun" in Search 2 (5), p. 172 (1971)
+
+    .. [3] Daryl R. Myers, "Solar Radiation: Practical Modeling for Renewable
+       Energy Applications", p. 4 CRC Press (2013)
+
+    See Also
+    --------
     declination_cooper69
     """
-    day_angle = _calculate_simple_day_angle(dayofyear)
-    return (
+    double = np.dtype(dtype) == np.float64
+    if double:
+        if isinstance(dayofyear, (int, float, np.integer, np.floating)):
+            return _declination_spencer71_scalar(dayofyear)
+        if USE_NUMBA:
+            return _declination_spencer71(dayofyear)
+
+    # for single precision the day angle is cast once, so that every ufunc
+    # below runs its float32 loop
+    day_angle = _as_dtype(_calculate_simple_day_angle(dayofyear), dtype)
+    if double and USE_NUMEXPR and isinstance(day_angle, np.ndarray):
+        # the whole series in one blocked pass without temporaries
+        return numexpr.evaluate(
+            '0.006918 -'
+            '0.399912 * cos(day_angle) + 0.070257 * sin(day_angle) -'
+            '0.006758 * cos(2. * day_angle) + 0.000907 * sin(2. * day_angle) -'
+            '0.002697 * cos(3. * day_angle) + 0.00148 * sin(3. * day_angle)',
+            local_dict={'day_angle': day_angle})
+
+    declination = (
         0.006918 -
         0.399912 * np.cos(day_angle) + 0.070257 * np.sin(day_angle) -
         0.006758 * np.cos(2. * day_angle) + 0.000907 * np.sin(2. * day_angle) -
         0.002697 * np.cos(3. * day_angle) + 0.00148 * np.sin(3. * day_angle)
     )
+    return _as_dtype(declination, dtype)
 
 
+def _declination_spencer71_scalar(dayofyear):
+    """
+    declination_spencer71 for a single day of year with the math module,
+    avoiding the per call overhead of numpy (or numba) ufunc dispatch
+    """
+    day_angle = (2. * math.pi / 365.) * (dayofyear - 1)
+    cos_da = math.cos(day_angle)
+    sin_da = math.sin(day_angle)
+    sin_da2 = sin_da * sin_da
+    return (
+        0.006918 -
+        0.399912 * cos_da + 0.070257 * sin_da -
+        0.006758 * (1. - 2. * sin_da2) + 0.000907 * (2. * sin_da * cos_da) -
+        0.002697 * cos_da * (1. - 4. * sin_da2) +
+        0.00148 * sin_da * (3. - 4. * sin_da2)
+    )
 
+
+# elementwise numba kernel of declination_spencer71. the multiple angle terms
+# come from one sin and one cos through the double and triple angle
+# identities. this only pays off in a fused pass, as numpy evaluates the
+# extra products slower than the sin/cos calls they replace
+@vectorize(['f8(i8)', 'f8(f8)'], cache=True, fastmath=FASTMATH)
+def _declination_spencer71(dayofyear):
+    day_angle = (2. * np.pi / 365.) * (dayofyear - 1)
+    cos_da = np.cos(day_angle)
+    sin_da = np.sin(day_angle)
+    sin_da2 = sin_da * sin_da
+    return (
+        0.006918 -
+        0.399912 * cos_da + 0.070257 * sin_da -
+        0.006758 * (1. - 2. * sin_da2) + 0.000907 * (2. * sin_da * cos_da) -
+        0.002697 * cos_da * (1. - 4. * sin_da2) +
+        0.00148 * sin_da * (3. - 4. * sin_da2)
+    )
+
+
+def declination_cooper69(dayofyear):
     """
     Solar declination from Duffie & Beckman and attributed to Cooper (1969).
 
@@ -984,20 +1711,198 @@ def _calculate_simple_day_angle(dayofyear, offset=1):
        \\right) \\right) = -23.45 \\cos \\left( \\frac{2 \\pi}{365}
        \\left(n_{day} + 10 \\right) \\right)
 
+    Parameters
+    ----------
+    dayofyear : numeric
+
+    Returns
+    -------
     declination (radians) : numeric
         Angular position of the sun at solar noon relative to the plane of the
         equator, approximately between +/-23.45 (degrees).
 
+    References
+    ----------
+    .. [1] J. A. Duffie and W. A. Beckman,  "Solar Engineering of Thermal
+       Processes, 3rd Edition" pp. 13-14, J. Wiley and Sons, New York (2006)
+
+    .. [2] J. H. Seinfeld and S. N. Pandis, "Atmospheric Chemistry and Physics"
+       p. 129, J. Wiley (1998)
+
+    .. [3] Daryl R. Myers, "Solar Radiation: Practical Modeling for Renewable
        Energy Applications", p. 4 CRC Press (2013)
 
+    See Also
+    --------
+    declination_spencer71
     """
     day_angle = _calculate_simple_day_angle(dayofyear)
-    dec = np.deg2rad(23.45 * np.sin(day_angle + (2.0 * np.pi / 365.0) * 285.0))
+    dec = np.deg2rad(23.45 * np.sin(day_angle + _COOPER_OFFSET_RAD))
     return dec
 
 
+@functools.lru_cache(maxsize=None)
+def _declination_lut():
+    """declination_spencer71 for day of year 1 to 366, computed once"""
+    lut = np.asarray(declination_spencer71(np.arange(1, 367)))
+    lut.flags.writeable = False
+    return lut
+
+
+@functools.lru_cache(maxsize=None)
+def _eot_lut():
+    """equation_of_time_spencer71 for day of year 1 to 366, computed once"""
+    lut = np.asarray(equation_of_time_spencer71(np.arange(1, 367)))
+    lut.flags.writeable = False
+    return lut
+
 
-def solar_azimuth_analytical(latitude, hourangle, declination, zenith):
+def _doy_index(dayofyear):
+    """
+    Rows of the day of year lookup tables, raising a ValueError for days
+    outside 1 to 366 rather than wrapping around or reading past the end.
+    """
+    index = np.asarray(dayofyear).astype(np.intp) - 1
+    if index.size and (index.min() < 0 or index.max() > 365):
+        raise ValueError('dayofyear must be between 1 and 366')
+    return index
+
+
+def declination_from_doy(dayofyear):
+    """
+    Solar declination of :py:func:`declination_spencer71`, looked up from
+    a table of its 366 daily values instead of evaluating the series at
+    every timestamp.
+
+    Parameters
+    ----------
+    dayofyear : int or array of int
+        Day of year from 1 to 366. Fractional days are truncated.
+
+    Returns
+    -------
+    declination : numpy.ndarray
+        Angular position of the sun at solar noon relative to the plane of the
+        equator, approximately between +/-23.45 (degrees), in radians.
+
+    Raises
+    ------
+    ValueError
+        If any day of year is outside 1 to 366.
+
+    See Also
+    --------
+    declination_spencer71
+    """
+    return _declination_lut()[_doy_index(dayofyear)]
+
+
+def equation_of_time_from_doy(dayofyear):
+    """
+    Equation of time of :py:func:`equation_of_time_spencer71`, looked up
+    from a table of its 366 daily values instead of evaluating the series
+    at every timestamp.
+
+    Parameters
+    ----------
+    dayofyear : int or array of int
+        Day of year from 1 to 366. Fractional days are truncated.
+
+    Returns
+    -------
+    equation_of_time : numpy.ndarray
+        Difference in time between solar time and mean solar time in minutes.
+
+    Raises
+    ------
+    ValueError
+        If any day of year is outside 1 to 366.
+
+    See Also
+    --------
+    equation_of_time_spencer71
+    """
+    return _eot_lut()[_doy_index(dayofyear)]
+
+
+def _analytical_use_numba(how):
+    """Check the `how` argument of the analytical solar position functions"""
+    if how == 'numba':
+        if not USE_NUMBA:
+            raise ImportError('Numba must be installed')
+        return True
+    elif how == 'numpy':
+        return False
+    raise ValueError("how must be either 'numba' or 'numpy'")
+
+
+def _analytical_kernel(kernel, *args):
+    """
+    Apply an elementwise numba kernel to its broadcast arguments, returning
+    a scalar for scalar arguments and a Series if any of the arguments is
+    one, as the numpy expressions do.
+    """
+    index = None
+    for arg in args:
+        if isinstance(arg, pd.Series):
+            index = arg.index
+            break
+    arrays = [np.asarray(arg) for arg in args]
+    shape = np.broadcast(*arrays).shape
+    if len(shape) == 1:
+        # zero-stride views for the scalar arguments, no copies
+        flat = [np.broadcast_to(arr, shape) for arr in arrays]
+    else:
+        flat = [np.broadcast_to(arr, shape).ravel() for arr in arrays]
+    out = np.empty(int(np.prod(shape)),
+                   dtype=np.result_type(np.float32,
+                                        *(arr.dtype for arr in arrays)))
+    kernel(*flat, out)
+    if not shape:
+        return out[0]
+    result = out.reshape(shape)
+    if index is not None:
+        result = pd.Series(result, index=index)
+    return result
+
+
+def _sin_cos(angle):
+    """
+    Sine and cosine of an angle in radians, as plain floats from the math
+    module for a scalar (typically the latitude of a single site), so they
+    enter the array expressions as constants.
+    """
+    if np.ndim(angle) == 0:
+        return math.sin(angle), math.cos(angle)
+    return np.sin(angle), np.cos(angle)
+
+
+# elementwise kernels for how='numba' in solar_zenith_analytical and
+# solar_azimuth_analytical, following their numpy expressions exactly.
+# they are compiled lazily on the first call rather than as ufuncs at
+# import, which would start numba's threading layer in every process
+# importing this module and make forked processes hang on exit
+@njit(parallel=True, cache=True, fastmath=FASTMATH)
+def _solar_zenith_kernel(latitude, hourangle, declination, out):
+    for i in prange(out.size):
+        out[i] = math.acos(
+            math.cos(declination[i]) * math.cos(latitude[i]) *
+            math.cos(hourangle[i]) +
+            math.sin(declination[i]) * math.sin(latitude[i]))
+
+
+@njit(parallel=True, cache=True, fastmath=FASTMATH)
+def _solar_azimuth_kernel(latitude, hourangle, declination, zenith, out):
+    for i in prange(out.size):
+        sin_azi = (math.sin(hourangle[i]) * math.cos(declination[i]) *
+                   math.cos(latitude[i]))
+        cos_azi = (math.cos(zenith[i]) * math.sin(latitude[i]) -
+                   math.sin(declination[i]))
+        out[i] = math.atan2(sin_azi, cos_azi) + math.pi
+
+
+def solar_azimuth_analytical(latitude, hourangle, declination, zenith,
+                             how='numpy', dtype=np.float64):
     """
     Analytical expression of solar azimuth angle based on spherical
     trigonometry.
@@ -1012,47 +1917,77 @@ def solar_azimuth_analytical(latitude, hourangle, declination, zenith):
         Declination of the sun in radians.
     zenith : numeric
         Solar zenith angle in radians.
+    how : str, optional, default 'numpy'
+        Options are 'numpy' or 'numba'. If numba is installed,
+        how='numba' evaluates the expression in a single compiled pass
+        per element, run multithreaded.
+    dtype : numpy dtype, default numpy.float64
+        Floating point type of the calculation, the inputs are cast to it
+        once. numpy.float32 halves the memory traffic of long series at
+        an error of at most about 1e-5 radians.
 
     Returns
     -------
     azimuth : numeric
         Solar azimuth angle in radians.
 
+    Notes
+    -----
+    The hour angle enters only through its sine and cosine, so hour angles
+    outside +/-pi, which :py:func:`hour_angle` returns around local
+    midnight, give the same azimuth as their equivalents within +/-pi.
+    Earlier versions took the sign of the hour angle instead, and for
+    such hour angles returned the azimuth mirrored about north, e.g.
+    0.04 rather than 6.25 radians for an hour angle of -181.5 degrees at
+    40 degrees latitude.
+
     References
+    ----------
+    .. [1] J. A. Duffie and W. A. Beckman,  "Solar Engineering of Thermal
+       Processes, 3rd Edition" pp. 14, J. Wiley and Sons, New York (2006)
+
+    .. [2] J. H. Seinfeld and S. N. Pandis, "Atmospheric Chemistry and Physics"
+       p. 132, J. Wiley (1998)
+
+    .. [3] `Wikipedia: Solar Azimuth Angle
+       <https://en.wikipedia.org/wiki/Solar_azimuth_angle>`_
+
+    .. [4] `PVCDROM: Azimuth Angle <http://www.pveducation.org/pvcdrom/2-
+       properties-sunlight/azimuth-angle>`_
+
+    See Also
+    --------
     declination_spencer71
     declination_cooper69
     hour_angle
     solar_zenith_analytical
+    solar_position_analytical
     """
-
-    numer = (np.cos(zenith) * np.sin(latitude) - np.sin(declination))
-    denom = (np.sin(zenith) * np.cos(latitude))
-
-    # cases that would generate new NaN values are safely ignored here
-    # since they are dealt with further below
-    with np.errstate(invalid='ignore', divide='ignore'):
-        cos_azi = numer / denom
-
-    # when zero division occurs, use the limit value of the analytical
-    # expression
-    cos_azi = \
-        np.where(np.isclose(denom,    0.0, rtol=0.0, atol=1e-8),  1.0, cos_azi)
-
-    # when too many round-ups in floating point math take cos_azi beyond
-    # 1.0, use 1.0
-    cos_azi = \
-        np.where(np.isclose(cos_azi,  1.0, rtol=0.0, atol=1e-8),  1.0, cos_azi)
-    cos_azi = \
-        np.where(np.isclose(cos_azi, -1.0, rtol=0.0, atol=1e-8), -1.0, cos_azi)
-
-    # when NaN values occur in input, ignore and pass to output
-    with np.errstate(invalid='ignore'):
-        sign_ha = np.sign(hourangle)
-
-    return sign_ha * np.arccos(cos_azi) + np.pi
-
-
- def solar_zenith_analytical(latitude, hourangle, declination):
+    double = np.dtype(dtype) == np.float64
+    if not double:
+        latitude, hourangle, declination, zenith = (
+            _as_dtype(arg, dtype)
+            for arg in (latitude, hourangle, declination, zenith))
+
+    if _analytical_use_numba(how):
+        return _analytical_kernel(_solar_azimuth_kernel, latitude, hourangle,
+                                  declination, zenith)
+
+    # sine and cosine of the azimuth from south, both multiplied by
+    # sin(zenith) * cos(latitude) >= 0. that leaves their angle unchanged,
+    # so no division (and no zero division handling) is needed, and
+    # arctan2 picks the quadrant from the sign of the hour angle while
+    # staying well conditioned near the meridian, unlike arccos
+    sin_lat, cos_lat = _sin_cos(latitude)
+    sin_azi = np.sin(hourangle) * np.cos(declination) * cos_lat
+    cos_azi = np.cos(zenith) * sin_lat - np.sin(declination)
+
+    azimuth = np.arctan2(sin_azi, cos_azi) + np.pi
+    return azimuth if double else _as_dtype(azimuth, dtype)
+
+
+def solar_zenith_analytical(latitude, hourangle, declination, how='numpy',
+                            dtype=np.float64):
     """
     Analytical expression of solar zenith angle based on spherical
     trigonometry.
@@ -1068,24 +2003,129 @@ def solar_azimuth_analytical(latitude, hourangle, declination, zenith):
         Hour angle in the local solar time in radians.
     declination : numeric
         Declination of the sun in radians.
+    how : str, optional, default 'numpy'
+        Options are 'numpy' or 'numba'. If numba is installed,
+        how='numba' evaluates the expression in a single compiled pass
+        per element, run multithreaded.
+    dtype : numpy dtype, default numpy.float64
+        Floating point type of the calculation, the inputs are cast to it
+        once. numpy.float32 halves the memory traffic of long series at
+        an error of at most about 1e-5 radians, growing to about 4e-4
+        radians within an arcminute of the zenith where arccos is ill
+        conditioned.
 
     Returns
     -------
     zenith : numeric
         Solar zenith angle in radians.
 
+    References
+    ----------
+    .. [1] J. A. Duffie and W. A. Beckman,  "Solar Engineering of Thermal
+       Processes, 3rd Edition" pp. 14, J. Wiley and Sons, New York (2006)
+
+    .. [2] J. H. Seinfeld and S. N. Pandis, "Atmospheric Chemistry and
+       Physics" p. 132, J. Wiley (1998)
+
+    .. [3] Daryl R. Myers, "Solar Radiation: Practical Modeling for
+       Renewable Energy Applications", p. 5 CRC Press (2013)
+
+    .. [4] `Wikipedia: Solar Zenith Angle
+       <https://en.wikipedia.org/wiki/Solar_zenith_angle>`_
+
+    .. [5] `PVCDROM: Sun's Position
+       <http://www.pveducation.org/pvcdrom/2-properties-sunlight/
+       suns-position>`_
+
+    See Also
+    --------
     declination_spencer71
     declination_cooper69
     hour_angle
+    solar_position_analytical
     """
-    return np.arccos(
-        np.cos(declination) * np.cos(latitude) * np.cos(hourangle) +
-        np.sin(declination) * np.sin(latitude)
+    double = np.dtype(dtype) == np.float64
+    if not double:
+        latitude, hourangle, declination = (
+            _as_dtype(arg, dtype)
+            for arg in (latitude, hourangle, declination))
+
+    if _analytical_use_numba(how):
+        return _analytical_kernel(_solar_zenith_kernel, latitude, hourangle,
+                                  declination)
+
+    sin_lat, cos_lat = _sin_cos(latitude)
+    zenith = np.arccos(
+        np.cos(declination) * cos_lat * np.cos(hourangle) +
+        np.sin(declination) * sin_lat
     )
+    return zenith if double else _as_dtype(zenith, dtype)
 
 
+def solar_position_analytical(latitude, hourangle, declination,
+                              dtype=np.float64):
+    """
+    Solar zenith and azimuth angles together, from the same analytical
+    expressions as :func:`solar_zenith_analytical` and
+    :func:`solar_azimuth_analytical`.
 
-[docs]def hour_angle(times, longitude, equation_of_time):
+    The sines and cosines of the latitude, hour angle and declination are
+    evaluated once and shared by both angles, and the azimuth uses the
+    cosine of the zenith directly, so that with a scalar latitude only
+    six transcendental functions are evaluated per element instead of
+    nine.
+
+    .. warning:: The analytic form neglects the effect of atmospheric
+        refraction.
+
+    Parameters
+    ----------
+    latitude : numeric
+        Latitude of location in radians.
+    hourangle : numeric
+        Hour angle in the local solar time in radians.
+    declination : numeric
+        Declination of the sun in radians.
+    dtype : numpy dtype, default numpy.float64
+        Floating point type of the calculation, see
+        :func:`solar_zenith_analytical`.
+
+    Returns
+    -------
+    zenith : numeric
+        Solar zenith angle in radians.
+    azimuth : numeric
+        Solar azimuth angle in radians.
+
+    See Also
+    --------
+    solar_zenith_analytical
+    solar_azimuth_analytical
+    """
+    double = np.dtype(dtype) == np.float64
+    if not double:
+        latitude, hourangle, declination = (
+            _as_dtype(arg, dtype)
+            for arg in (latitude, hourangle, declination))
+
+    sin_lat, cos_lat = _sin_cos(latitude)
+    sin_dec = np.sin(declination)
+    cos_dec = np.cos(declination)
+    cos_dec_lat = cos_dec * cos_lat
+    cos_zenith = cos_dec_lat * np.cos(hourangle) + sin_dec * sin_lat
+    zenith = np.arccos(cos_zenith)
+    # same unnormalised sine and cosine of the azimuth from south as in
+    # solar_azimuth_analytical
+    sin_azi = np.sin(hourangle) * cos_dec_lat
+    cos_azi = cos_zenith * sin_lat - sin_dec
+    azimuth = np.arctan2(sin_azi, cos_azi) + np.pi
+
+    if not double:
+        zenith, azimuth = _as_dtype(zenith, dtype), _as_dtype(azimuth, dtype)
+    return zenith, azimuth
+
+
+def hour_angle(times, longitude, equation_of_time):
     """
     Hour angle in local solar time. Zero at local solar noon.
 
@@ -1104,57 +2144,132 @@ def solar_azimuth_analytical(latitude, hourangle, declination, zenith):
     hour_angle : numeric
         Hour angle in local solar time in degrees.
 
+    References
+    ----------
+    .. [1] J. A. Duffie and W. A. Beckman,  "Solar Engineering of Thermal
+       Processes, 3rd Edition" pp. 13, J. Wiley and Sons, New York (2006)
 
+    .. [2] J. H. Seinfeld and S. N. Pandis, "Atmospheric Chemistry and Physics"
+       p. 132, J. Wiley (1998)
+
+    .. [3] Daryl R. Myers, "Solar Radiation: Practical Modeling for Renewable
+       Energy Applications", p. 5 CRC Press (2013)
+
+    See Also
+    --------
     equation_of_time_spencer71
     equation_of_time_pvcdrom
     """
     naive_times = times.tz_localize(None)  # naive but still localized
-    # hours - timezone = (times - normalized_times) - (naive_times - times)
-    hrs_minus_tzs = 1 / NS_PER_HR * (
-        2 * times.view(np.int64) - times.normalize().view(np.int64) -
-        naive_times.view(np.int64))
-    # ensure array return instead of a version-dependent pandas <T>Index
-    return np.asarray(
-        15. * (hrs_minus_tzs - 12.) + longitude + equation_of_time / 4.)
-
-
-
-def _hour_angle_to_hours(times, hourangle, longitude, equation_of_time):
-    """converts hour angles in degrees to hours as a numpy array"""
-    naive_times = times.tz_localize(None)  # naive but still localized
-    tzs = 1 / NS_PER_HR * (
-        naive_times.view(np.int64) - times.view(np.int64))
-    hours = (hourangle - longitude - equation_of_time / 4.) / 15. + 12. + tzs
-    return np.asarray(hours)
+    # hours - timezone = (times - normalized_times) - (naive_times - times),
+    # taken exactly in int64 nanoseconds in one buffer
+    ns_minus_tzs = np.multiply(_index_ns(times), 2)
+    ns_minus_tzs -= _index_ns(times.normalize())
+    ns_minus_tzs -= _index_ns(naive_times)
+    # then scaled and offset in place in one float buffer, which also
+    # ensures an array return instead of a version-dependent pandas <T>Index
+    hourangle = np.multiply(ns_minus_tzs, 15. / NS_PER_HR)
+    hourangle -= 15. * 12.
+    hourangle += longitude
+    hourangle += np.asarray(equation_of_time) / 4.
+    return hourangle
+
+
+def _hour_angle_to_hours_cached(t_ns, naive_ns, hourangle, longitude,
+                                equation_of_time):
+    """
+    converts hour angles in degrees to hours as a numpy array, from the
+    int64 nanoseconds of the localized times and of their naive (but still
+    localized) counterparts
+    """
+    # longitude and equation of time fold into one offset, a constant when
+    # both are scalars, leaving a single pass over the hour angles
+    offset = 12. - (longitude + np.asarray(equation_of_time) / 4.) / 15.
+    # timezone offsets in hours, with the rest added in place
+    hours = np.subtract(naive_ns, t_ns) / NS_PER_HR
+    hours += offset
+    hours += np.asarray(hourangle) / 15.
+    return hours
 
 
-def _local_times_from_hours_since_midnight(times, hours):
+def _hours_to_ns(naive_norm_ns, hours):
     """
-    converts hours since midnight from an array of floats to localized times
+    int64 nanoseconds of the naive local times the given hours after the
+    naive local midnights preceding the times
     """
-    tz_info = times.tz  # pytz timezone info
-    naive_times = times.tz_localize(None)  # naive but still localized
-    # normalize local, naive times to previous midnight and add the hours until
-    # sunrise, sunset, and transit
-    return pd.DatetimeIndex(
-        (naive_times.normalize().view(np.int64) +
-         (hours * NS_PER_HR).astype(np.int64)).astype('datetime64[ns]'),
-        tz=tz_info)
+    # add the hours until sunrise, sunset, or transit to the midnights, all
+    # in one int64 buffer. the float to int cast truncates like astype
+    ns = np.empty(np.shape(hours), dtype=np.int64)
+    np.multiply(hours, NS_PER_HR, out=ns, casting='unsafe')
+    ns += naive_norm_ns
+    return ns
 
 
 def _times_to_hours_after_local_midnight(times):
     """convert local pandas datetime indices to array of hours as floats"""
     times = times.tz_localize(None)
-    hrs = 1 / NS_PER_HR * (
-        times.view(np.int64) - times.normalize().view(np.int64))
-    return np.array(hrs)
+    return np.subtract(_index_ns(times),
+                       _index_ns(times.normalize())) / NS_PER_HR
 
 
-[docs]def sun_rise_set_transit_geometric(times, latitude, longitude, declination,
+# serial for the same reason as _ephemeris_loop: this is the default path
+# whenever numba is installed, and must not start the threading layer
+@njit(cache=True, fastmath=FASTMATH)
+def _rise_set_transit_core(t_ns, naive_ns, naive_norm_ns, declination,
+                           equation_of_time, tan_latitude, longitude):
+    """
+    Sunrise, sunset and transit as int64 nanoseconds, computing each
+    element the way _hour_angle_to_hours_cached and _hours_to_ns do. All
+    arguments are 1-D arrays of the same length.
+    """
+    n = t_ns.shape[0]
+    sunrise = np.empty(n, dtype=np.int64)
+    sunset = np.empty(n, dtype=np.int64)
+    transit = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        sunset_angle = math.degrees(
+            math.acos(-math.tan(declination[i]) * tan_latitude[i]))
+        # hours of transit, sunrise and sunset are offset from each other by
+        # the hour angle of sunset
+        transit_hour = ((naive_ns[i] - t_ns[i]) / NS_PER_HR + 12. +
+                        (-longitude[i] - equation_of_time[i] / 4.) / 15.)
+        sunrise[i] = naive_norm_ns[i] + np.int64(
+            (transit_hour - sunset_angle / 15.) * NS_PER_HR)
+        sunset[i] = naive_norm_ns[i] + np.int64(
+            (transit_hour + sunset_angle / 15.) * NS_PER_HR)
+        transit[i] = naive_norm_ns[i] + np.int64(transit_hour * NS_PER_HR)
+    return sunrise, sunset, transit
+
+
+def _rise_set_transit_numpy(t_ns, naive_ns, naive_norm_ns, declination,
+                            equation_of_time, tan_latitude, longitude):
+    """numpy version of _rise_set_transit_core"""
+    sunset_hours = np.degrees(
+        np.arccos(-np.tan(declination) * tan_latitude)) / 15.
+    transit_hours = _hour_angle_to_hours_cached(
+        t_ns, naive_ns, 0, longitude, equation_of_time)
+    # hours of sunrise and sunset in one scratch buffer, shared by both
+    hours = np.empty(np.broadcast(transit_hours, sunset_hours).shape)
+    np.subtract(transit_hours, sunset_hours, out=hours)
+    sunrise = _hours_to_ns(naive_norm_ns, hours)
+    np.add(transit_hours, sunset_hours, out=hours)
+    sunset = _hours_to_ns(naive_norm_ns, hours)
+    transit = _hours_to_ns(naive_norm_ns, transit_hours)
+    return sunrise, sunset, transit
+
+
+def sun_rise_set_transit_geometric(times, latitude, longitude, declination,
                                    equation_of_time):
     """
     Geometric calculation of solar sunrise, sunset, and transit.
 
+    .. warning:: The geometric calculation assumes a circular earth orbit with
+        the sun as a point source at its center, and neglects the effect of
+        atmospheric refraction on zenith. The error depends on location and
+        time of year but is of order 10 minutes.
+
+    Parameters
+    ----------
     times : pandas.DatetimeIndex
         Corresponding timestamps, must be localized to the timezone for the
         ``latitude`` and ``longitude``.
@@ -1176,20 +2291,100 @@ def _times_to_hours_after_local_midnight(times):
     transit : datetime
         localized sun transit time
 
+    References
+    ----------
+    .. [1] J. A. Duffie and W. A. Beckman,  "Solar Engineering of Thermal
+       Processes, 3rd Edition," J. Wiley and Sons, New York (2006)
+
+    .. [2] Frank Vignola et al., "Solar And Infrared Radiation Measurements,"
+       CRC Press (2012)
+
     """
-    latitude_rad = np.radians(latitude)  # radians
-    sunset_angle_rad = np.arccos(-np.tan(declination) * np.tan(latitude_rad))
-    sunset_angle = np.degrees(sunset_angle_rad)  # degrees
-    # solar noon is at hour angle zero
-    # so sunrise is just negative of sunset
-    sunrise_angle = -sunset_angle
-    sunrise_hour = _hour_angle_to_hours(
-        times, sunrise_angle, longitude, equation_of_time)
-    sunset_hour = _hour_angle_to_hours(
-        times, sunset_angle, longitude, equation_of_time)
-    transit_hour = _hour_angle_to_hours(times, 0, longitude, equation_of_time)
-    sunrise = _local_times_from_hours_since_midnight(times, sunrise_hour)
-    sunset = _local_times_from_hours_since_midnight(times, sunset_hour)
-    transit = _local_times_from_hours_since_midnight(times, transit_hour)
+    # localize, normalize and take the int64 views once for all three events
+    naive_times = times.tz_localize(None)  # naive but still localized
+    t_ns = _index_ns(times)
+    naive_ns = _index_ns(naive_times)
+    naive_norm_ns = _index_ns(naive_times.normalize())
+
+    # only declination needs numpy when latitude is a plain number
+    if np.isscalar(latitude):
+        tan_latitude = math.tan(math.radians(latitude))
+    else:
+        tan_latitude = np.tan(np.radians(latitude))
+    args = (declination, equation_of_time, tan_latitude, longitude)
+
+    if USE_NUMBA:
+        # all three events in a single compiled pass, with zero-stride
+        # views standing in for the scalar inputs
+        core = _rise_set_transit_core
+        args = [np.broadcast_to(np.asarray(arg, dtype=np.float64),
+                                t_ns.shape) for arg in args]
+    else:
+        core = _rise_set_transit_numpy
+        args = [np.asarray(arg) for arg in args]
+
+    sunrise, sunset, transit = (
+        pd.DatetimeIndex(ns.view('datetime64[ns]'), tz=times.tz)
+        for ns in core(t_ns, naive_ns, naive_norm_ns, *args))
     return sunrise, sunset, transit
 
+
+def sun_rise_set_transit_geometric_batch(t_ns, latitude, longitude,
+                                         declination, equation_of_time):
+    """
+    Geometric calculation of solar sunrise, sunset, and transit for many
+    sites and times in one pass.
+
+    All inputs are broadcast against each other, so e.g. a grid of sites
+    over a common time series can be given as ``np.repeat``/``np.tile``
+    laid out 1-D arrays. Times are UTC and results refer to the UTC day
+    of each time, which avoids any per site timezone handling.
+
+    Parameters
+    ----------
+    t_ns : array of int64
+        UTC times as nanoseconds since the epoch, e.g.
+        ``DatetimeIndex.asi8``.
+    latitude : numeric
+        Latitude in degrees, positive north of equator, negative to south
+    longitude : numeric
+        Longitude in degrees, positive east of prime meridian, negative to west
+    declination : numeric
+        declination angle in radians at ``t_ns``
+    equation_of_time : numeric
+        difference in time between solar time and mean solar time in minutes
+
+    Returns
+    -------
+    sunrise, sunset, transit : numpy.ndarray of int64
+        UTC times as nanoseconds since the epoch, in the broadcast shape
+        of the inputs.
+
+    See Also
+    --------
+    sun_rise_set_transit_geometric
+    declination_from_doy
+    equation_of_time_from_doy
+    """
+    arrays = (np.asarray(t_ns, dtype=np.int64),
+              np.asarray(latitude, dtype=np.float64),
+              np.asarray(longitude, dtype=np.float64),
+              np.asarray(declination, dtype=np.float64),
+              np.asarray(equation_of_time, dtype=np.float64))
+    shape = np.broadcast(*arrays).shape
+    # contiguous 1-D structure of arrays
+    t_ns, latitude, longitude, declination, equation_of_time = (
+        np.ascontiguousarray(np.broadcast_to(arr, shape)).ravel()
+        for arr in arrays)
+
+    # in UTC the naive times are the times themselves
+    naive_norm_ns = t_ns - np.mod(t_ns, 24 * int(NS_PER_HR))
+    tan_latitude = np.tan(np.radians(latitude))
+
+    if USE_NUMBA:
+        core = _rise_set_transit_core
+    else:
+        core = _rise_set_transit_numpy
+    return tuple(arr.reshape(shape) for arr in core(
+        t_ns, t_ns, naive_norm_ns, declination, equation_of_time,
+        tan_latitude, longitude))
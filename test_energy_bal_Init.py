@@ -0,0 +1,267 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+import energy_bal_Init as solarposition
+
+
+requires_as_unit = pytest.mark.skipif(
+    not hasattr(pd.DatetimeIndex, 'as_unit'),
+    reason='DatetimeIndex units other than ns need pandas >= 2')
+
+requires_numba = pytest.mark.skipif(
+    not solarposition.USE_NUMBA, reason='requires numba')
+
+
+@pytest.fixture
+def times_ns():
+    times = pd.date_range('2020-06-01', periods=48, freq='h',
+                          tz='US/Arizona')
+    if hasattr(times, 'as_unit'):
+        times = times.as_unit('ns')
+    return times
+
+
+@requires_as_unit
+@pytest.mark.parametrize('unit', ['s', 'ms', 'us'])
+def test_ephemeris_non_ns_index(times_ns, unit):
+    expected = solarposition.ephemeris(times_ns, 32.2, -111)
+    result = solarposition.ephemeris(times_ns.as_unit(unit), 32.2, -111)
+    np.testing.assert_allclose(result.values, expected.values)
+
+
+@requires_as_unit
+@pytest.mark.parametrize('unit', ['s', 'ms', 'us'])
+def test_hour_angle_non_ns_index(times_ns, unit):
+    eot = solarposition.equation_of_time_spencer71(times_ns.dayofyear)
+    expected = solarposition.hour_angle(times_ns, -111, eot)
+    result = solarposition.hour_angle(times_ns.as_unit(unit), -111, eot)
+    np.testing.assert_allclose(result, expected)
+
+
+@requires_as_unit
+@pytest.mark.parametrize('unit', ['s', 'ms', 'us'])
+def test_sun_rise_set_transit_geometric_non_ns_index(times_ns, unit):
+    dayofyear = times_ns.dayofyear
+    declination = solarposition.declination_spencer71(dayofyear)
+    eot = solarposition.equation_of_time_spencer71(dayofyear)
+    expected = solarposition.sun_rise_set_transit_geometric(
+        times_ns, 32.2, -111, declination, eot)
+    result = solarposition.sun_rise_set_transit_geometric(
+        times_ns.as_unit(unit), 32.2, -111, declination, eot)
+    for res, exp in zip(result, expected):
+        np.testing.assert_array_equal(res.as_unit('ns'), exp)
+
+
+@pytest.mark.parametrize('func', [solarposition.declination_from_doy,
+                                  solarposition.equation_of_time_from_doy])
+def test_from_doy_range(func):
+    np.testing.assert_array_equal(func([1, 366]), func(np.array([1., 366.])))
+    for dayofyear in (0, 367, [1, 0], np.array([366, 400])):
+        with pytest.raises(ValueError):
+            func(dayofyear)
+
+
+def test_sun_rise_set_transit_ephem_dtypes():
+    times = pd.date_range('2020-06-01', periods=3, freq='D',
+                          tz='US/Arizona')
+    result = solarposition.sun_rise_set_transit_ephem(times, 32.2, -111)
+    expected = solarposition.sun_rise_set_transit_spa(times, 32.2, -111)
+    assert list(result.dtypes) == list(expected.dtypes)
+    assert all(dtype == 'datetime64[ns, US/Arizona]'
+               for dtype in result.dtypes)
+
+
+@pytest.mark.parametrize('how', ['numpy', 'numba'] if solarposition.USE_NUMBA
+                         else ['numpy'])
+def test_solar_azimuth_analytical_hour_angle_beyond_pi(how):
+    latitude = np.radians(40)
+    declination = 0.1
+    # hour_angle returns values slightly beyond -180 degrees near midnight
+    hourangle = np.radians(np.array([-181.5, 178.5, 181.5, -178.5]))
+    zenith = solarposition.solar_zenith_analytical(
+        latitude, hourangle, declination)
+    azimuth = solarposition.solar_azimuth_analytical(
+        latitude, hourangle, declination, zenith, how=how)
+    # same azimuth as the hour angle wrapped into +/-180 degrees, just
+    # west of north at -181.5 degrees, rather than the mirrored 0.0364
+    np.testing.assert_allclose(azimuth[0], azimuth[1])
+    np.testing.assert_allclose(azimuth[2], azimuth[3])
+    np.testing.assert_allclose(azimuth[0], 6.246815580756273)
+    np.testing.assert_allclose(azimuth[2], 2 * np.pi - azimuth[0])
+
+
+@pytest.fixture
+def times_utc():
+    times = pd.date_range('2020-01-01', periods=240, freq='37h', tz='UTC')
+    if hasattr(times, 'as_unit'):
+        times = times.as_unit('ns')
+    return times
+
+
+def test_sun_rise_set_transit_geometric_batch(times_utc):
+    dayofyear = times_utc.dayofyear
+    declination = solarposition.declination_spencer71(dayofyear)
+    eot = solarposition.equation_of_time_spencer71(dayofyear)
+    expected = solarposition.sun_rise_set_transit_geometric(
+        times_utc, 32.2, -111, declination, eot)
+    result = solarposition.sun_rise_set_transit_geometric_batch(
+        times_utc.asi8, 32.2, -111, declination, eot)
+    for res, exp in zip(result, expected):
+        assert res.dtype == np.int64
+        np.testing.assert_array_equal(res, exp.asi8)
+
+
+def test_sun_rise_set_transit_geometric_batch_broadcast(times_utc):
+    dayofyear = times_utc.dayofyear
+    declination = np.asarray(solarposition.declination_spencer71(dayofyear))
+    eot = np.asarray(solarposition.equation_of_time_spencer71(dayofyear))
+    latitude = np.array([[-33.9], [0.], [32.2]])
+    longitude = np.array([[18.4], [-78.5], [-111.]])
+    result = solarposition.sun_rise_set_transit_geometric_batch(
+        times_utc.asi8, latitude, longitude, declination, eot)
+    for res in result:
+        assert res.shape == (3, len(times_utc))
+    for i in range(3):
+        expected = solarposition.sun_rise_set_transit_geometric_batch(
+            times_utc.asi8, latitude[i, 0], longitude[i, 0], declination,
+            eot)
+        for res, exp in zip(result, expected):
+            np.testing.assert_array_equal(res[i], exp)
+
+
+@pytest.fixture
+def analytical_inputs():
+    index = pd.date_range('2020-01-01', periods=200, freq='h')
+    hourangle = pd.Series(np.linspace(-np.pi, np.pi, 200), index=index)
+    declination = np.linspace(-0.4, 0.4, 200)
+    return np.radians(32.2), hourangle, declination
+
+
+@requires_numba
+def test_analytical_how_numba(analytical_inputs):
+    latitude, hourangle, declination = analytical_inputs
+    zenith = solarposition.solar_zenith_analytical(
+        latitude, hourangle, declination)
+    azimuth = solarposition.solar_azimuth_analytical(
+        latitude, hourangle, declination, zenith)
+    zenith_numba = solarposition.solar_zenith_analytical(
+        latitude, hourangle, declination, how='numba')
+    azimuth_numba = solarposition.solar_azimuth_analytical(
+        latitude, hourangle, declination, zenith, how='numba')
+    for result, expected in ((zenith_numba, zenith),
+                             (azimuth_numba, azimuth)):
+        assert isinstance(result, pd.Series)
+        assert result.index.equals(hourangle.index)
+        np.testing.assert_allclose(result, expected, atol=1e-12)
+    # scalars in, scalar out
+    result = solarposition.solar_zenith_analytical(0.5, 0.2, 0.1, how='numba')
+    assert np.ndim(result) == 0
+    np.testing.assert_allclose(
+        result, solarposition.solar_zenith_analytical(0.5, 0.2, 0.1))
+
+
+def test_analytical_how_invalid():
+    with pytest.raises(ValueError):
+        solarposition.solar_zenith_analytical(0.5, 0.2, 0.1, how='fortran')
+    with pytest.raises(ValueError):
+        solarposition.solar_azimuth_analytical(0.5, 0.2, 0.1, 0.3, how='')
+
+
+@pytest.mark.parametrize('func, atol', [
+    (solarposition.declination_spencer71, 1e-6),
+    (solarposition.equation_of_time_spencer71, 1e-4)])
+def test_spencer71_float32(func, atol):
+    dayofyear = np.arange(1, 367)
+    expected = func(dayofyear)
+    result = func(dayofyear, dtype=np.float32)
+    assert result.dtype == np.float32
+    np.testing.assert_allclose(result, expected, rtol=0, atol=atol)
+    series = func(pd.Series(dayofyear), dtype=np.float32)
+    assert isinstance(series, pd.Series) and series.dtype == np.float32
+    scalar = func(100, dtype=np.float32)
+    assert isinstance(scalar, np.float32)
+    np.testing.assert_allclose(scalar, func(100), rtol=0, atol=atol)
+
+
+@pytest.mark.parametrize('how', ['numpy', 'numba'] if solarposition.USE_NUMBA
+                         else ['numpy'])
+def test_analytical_float32(analytical_inputs, how):
+    latitude, hourangle, declination = analytical_inputs
+    zenith = solarposition.solar_zenith_analytical(
+        latitude, hourangle, declination)
+    azimuth = solarposition.solar_azimuth_analytical(
+        latitude, hourangle, declination, zenith)
+    zenith32 = solarposition.solar_zenith_analytical(
+        latitude, hourangle, declination, how=how, dtype=np.float32)
+    azimuth32 = solarposition.solar_azimuth_analytical(
+        latitude, hourangle, declination, zenith, how=how, dtype=np.float32)
+    for result, expected in ((zenith32, zenith), (azimuth32, azimuth)):
+        assert isinstance(result, pd.Series)
+        assert result.dtype == np.float32
+    np.testing.assert_allclose(zenith32, zenith, rtol=0, atol=1e-5)
+    # azimuths at hour angles of +/-pi may land on either side of 0/2*pi
+    difference = np.remainder(azimuth32 - azimuth + np.pi, 2 * np.pi) - np.pi
+    np.testing.assert_allclose(difference, 0, atol=1e-5)
+    scalar = solarposition.solar_zenith_analytical(
+        0.5, 0.2, 0.1, how=how, dtype=np.float32)
+    assert isinstance(scalar, np.float32)
+    scalar = solarposition.solar_azimuth_analytical(
+        0.5, 0.2, 0.1, 0.3, how=how, dtype=np.float32)
+    assert isinstance(scalar, np.float32)
+
+
+@pytest.mark.parametrize('latitude', [np.radians(32.2),
+                                      np.linspace(-1.4, 1.4, 200)])
+def test_solar_position_analytical(analytical_inputs, latitude):
+    _, hourangle, declination = analytical_inputs
+    zenith, azimuth = solarposition.solar_position_analytical(
+        latitude, hourangle, declination)
+    expected_zenith = solarposition.solar_zenith_analytical(
+        latitude, hourangle, declination)
+    expected_azimuth = solarposition.solar_azimuth_analytical(
+        latitude, hourangle, declination, expected_zenith)
+    for result in (zenith, azimuth):
+        assert isinstance(result, pd.Series)
+        assert result.index.equals(hourangle.index)
+    np.testing.assert_allclose(zenith, expected_zenith, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(azimuth, expected_azimuth, rtol=0, atol=1e-12)
+
+
+def test_solar_position_analytical_scalar_float32():
+    zenith, azimuth = solarposition.solar_position_analytical(0.5, 0.2, 0.1)
+    expected_zenith = solarposition.solar_zenith_analytical(0.5, 0.2, 0.1)
+    np.testing.assert_allclose(zenith, expected_zenith)
+    np.testing.assert_allclose(azimuth, solarposition.solar_azimuth_analytical(
+        0.5, 0.2, 0.1, expected_zenith))
+    zenith, azimuth = solarposition.solar_position_analytical(
+        0.5, 0.2, 0.1, dtype=np.float32)
+    assert isinstance(zenith, np.float32)
+    assert isinstance(azimuth, np.float32)
+
+
+@pytest.mark.parametrize('time', [
+    dt.datetime(2020, 6, 1, 18, 30, 15, 250000),
+    dt.datetime(2020, 6, 1, 11, 30, 15, 250000,
+                tzinfo=dt.timezone(dt.timedelta(hours=-7))),
+    pd.Timestamp('2020-12-21 07:05', tz='US/Arizona'),
+])
+def test_ephemeris_scalar_matches_index(time):
+    expected = solarposition.ephemeris(pd.DatetimeIndex([time]), 32.2, -111)
+    scalar = solarposition._ephemeris_scalar(time, 32.2, -111)
+    result = solarposition.get_solarposition(time, 32.2, -111,
+                                             method='ephemeris')
+    for res in (scalar, result):
+        assert list(res.columns) == list(expected.columns)
+        np.testing.assert_allclose(res.values, expected.values, rtol=0,
+                                   atol=1e-8)
+
+
+def test_get_solarposition_ephemeris_nat():
+    result = solarposition.get_solarposition(pd.NaT, 32.2, -111,
+                                             method='ephemeris')
+    assert len(result) == 1
+    assert result.isna().all(axis=None)